@@ -32,9 +32,97 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+# Connections per worker process; gunicorn.conf.py sizes this to the worker's concurrency
+if os.environ.get("DB_POOL_SIZE"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_size"] = int(os.environ["DB_POOL_SIZE"])
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", 10))
 
 # Google Places API key from environment variables
 app.config["GOOGLE_PLACES_API_KEY"] = os.environ.get("GOOGLE_PLACES_API_KEY")
 
+# Place lookup backend: "google", or "synthetic" for load testing without the real API
+app.config["PLACES_PROVIDER"] = os.environ.get("PLACES_PROVIDER", "google")
+app.config["SYNTHETIC_PLACES_SEED"] = int(os.environ.get("SYNTHETIC_PLACES_SEED", 0))
+app.config["SYNTHETIC_PLACES_PER_CELL"] = int(os.environ.get("SYNTHETIC_PLACES_PER_CELL", 2))
+app.config["SYNTHETIC_PLACES_LATENCY"] = float(os.environ.get("SYNTHETIC_PLACES_LATENCY", 0.0))
+app.config["SYNTHETIC_PLACES_JITTER"] = float(os.environ.get("SYNTHETIC_PLACES_JITTER", 0.0))
+app.config["SYNTHETIC_PLACES_ERROR_RATE"] = float(os.environ.get("SYNTHETIC_PLACES_ERROR_RATE", 0.0))
+
+# Nearby places cache (TTL and max age in seconds, precision as geohash length)
+app.config["PLACES_CACHE_TTL"] = int(os.environ.get("PLACES_CACHE_TTL", 300))
+app.config["PLACES_CACHE_MAX_ENTRIES"] = int(os.environ.get("PLACES_CACHE_MAX_ENTRIES", 1024))
+app.config["PLACES_CACHE_PRECISION"] = int(os.environ.get("PLACES_CACHE_PRECISION", 7))
+app.config["PLACES_DB_MAX_AGE"] = int(os.environ.get("PLACES_DB_MAX_AGE", 86400))
+
+# In-process spatial index over stored places (cell size in degrees, cell TTL in seconds)
+app.config["PLACES_INDEX_CELL_SIZE"] = float(os.environ.get("PLACES_INDEX_CELL_SIZE", 0.01))
+app.config["PLACES_INDEX_CELL_TTL"] = int(os.environ.get("PLACES_INDEX_CELL_TTL", 600))
+app.config["PLACES_INDEX_MAX_CELLS"] = int(os.environ.get("PLACES_INDEX_MAX_CELLS", 10000))
+
+# Largest radius in meters accepted for place searches (the Places API maximum)
+app.config["MAX_SEARCH_RADIUS"] = int(os.environ.get("MAX_SEARCH_RADIUS", 50000))
+
+# Seconds before the category registry reloads on its own (0 keeps it until invalidated)
+app.config["CATEGORY_REGISTRY_TTL"] = int(os.environ.get("CATEGORY_REGISTRY_TTL", 0))
+
+# Places API protection: circuit breaker (slow call and reset timeout in seconds) and per-type quota (calls per second)
+app.config["UPSTREAM_FAILURE_THRESHOLD"] = int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", 5))
+app.config["UPSTREAM_RESET_TIMEOUT"] = int(os.environ.get("UPSTREAM_RESET_TIMEOUT", 30))
+app.config["UPSTREAM_SLOW_CALL"] = float(os.environ.get("UPSTREAM_SLOW_CALL", 3.0))
+app.config["UPSTREAM_QUOTA_RATE"] = float(os.environ.get("UPSTREAM_QUOTA_RATE", 10.0))
+app.config["UPSTREAM_QUOTA_BURST"] = int(os.environ.get("UPSTREAM_QUOTA_BURST", 20))
+
+# Seconds a resolved user and their settings are reused before reloading
+app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", 30))
+
+# Nearby results are reused while the user stays within this fraction of their search radius
+app.config["MOVEMENT_THRESHOLD_FRACTION"] = float(os.environ.get("MOVEMENT_THRESHOLD_FRACTION", 0.1))
+app.config["MOVEMENT_RESULT_MAX_AGE"] = int(os.environ.get("MOVEMENT_RESULT_MAX_AGE", 120))
+
+# Seconds before the same reminder/place pair is notified again
+app.config["NOTIFICATION_COOLDOWN"] = int(os.environ.get("NOTIFICATION_COOLDOWN", 3600))
+app.config["NOTIFICATION_DEDUP_MAX_ENTRIES"] = int(os.environ.get("NOTIFICATION_DEDUP_MAX_ENTRIES", 100000))
+
+# Concurrent per-category lookups shared by all requests of a worker (deadline in seconds);
+# gunicorn.conf.py sizes the pool to the worker's concurrency times its categories
+app.config["NEARBY_MAX_WORKERS"] = int(os.environ.get("NEARBY_MAX_WORKERS", 8))
+app.config["NEARBY_DEADLINE"] = float(os.environ.get("NEARBY_DEADLINE", 5.0))
+app.config["NEARBY_BATCH_MAX_POSITIONS"] = int(os.environ.get("NEARBY_BATCH_MAX_POSITIONS", 500))
+
+# Background prefetch of stale places in hot tiles (interval and stale age in seconds, rate in calls per second)
+app.config["PREFETCH_ENABLED"] = os.environ.get("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+app.config["PREFETCH_INTERVAL"] = int(os.environ.get("PREFETCH_INTERVAL", 60))
+app.config["PREFETCH_STALE_AFTER"] = int(os.environ.get("PREFETCH_STALE_AFTER", 72000))
+app.config["PREFETCH_RATE"] = float(os.environ.get("PREFETCH_RATE", 1.0))
+app.config["PREFETCH_QUEUE_SIZE"] = int(os.environ.get("PREFETCH_QUEUE_SIZE", 256))
+app.config["PREFETCH_HOT_TILES"] = int(os.environ.get("PREFETCH_HOT_TILES", 50))
+app.config["PREFETCH_RADIUS"] = int(os.environ.get("PREFETCH_RADIUS", 1000))
+
+# Optional write-behind buffer for notification history (interval and enqueue timeout in seconds)
+app.config["NOTIFICATION_BUFFER_ENABLED"] = os.environ.get("NOTIFICATION_BUFFER_ENABLED", "false").lower() in ("1", "true", "yes")
+app.config["NOTIFICATION_BUFFER_MAX_BATCH"] = int(os.environ.get("NOTIFICATION_BUFFER_MAX_BATCH", 500))
+app.config["NOTIFICATION_BUFFER_INTERVAL"] = float(os.environ.get("NOTIFICATION_BUFFER_INTERVAL", 1.0))
+app.config["NOTIFICATION_BUFFER_MAX_PENDING"] = int(os.environ.get("NOTIFICATION_BUFFER_MAX_PENDING", 10000))
+app.config["NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT"] = float(os.environ.get("NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT", 0.5))
+
+# Page sizes for the reminder and notification history listings
+app.config["PAGE_SIZE_DEFAULT"] = int(os.environ.get("PAGE_SIZE_DEFAULT", 50))
+app.config["PAGE_SIZE_MAX"] = int(os.environ.get("PAGE_SIZE_MAX", 200))
+
+# Delta sync: seconds of overlap between syncs and how long deleted reminders are reported
+app.config["SYNC_OVERLAP"] = int(os.environ.get("SYNC_OVERLAP", 2))
+app.config["SYNC_TOMBSTONE_RETENTION"] = int(os.environ.get("SYNC_TOMBSTONE_RETENTION", 30 * 24 * 3600))
+
+# Response compression for bodies of at least COMPRESSION_MIN_SIZE bytes (level 1-9 for gzip, up to 11 for Brotli)
+app.config["COMPRESSION_ENABLED"] = os.environ.get("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+app.config["COMPRESSION_MIN_SIZE"] = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+app.config["COMPRESSION_LEVEL"] = int(os.environ.get("COMPRESSION_LEVEL", 6))
+
+# Opt-in request instrumentation served on /metrics (slow request threshold in seconds)
+app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+app.config["PROFILING_SLOW_REQUEST"] = float(os.environ.get("PROFILING_SLOW_REQUEST", 1.0))
+app.config["PROFILING_CPROFILE"] = os.environ.get("PROFILING_CPROFILE", "false").lower() in ("1", "true", "yes")
+app.config["PROFILING_DUMP_DIR"] = os.environ.get("PROFILING_DUMP_DIR", "profiles")
+
 # Initialize SQLAlchemy with the app
 db.init_app(app)
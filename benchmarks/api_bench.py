@@ -0,0 +1,382 @@
+"""Benchmark the API endpoints against a seeded database.
+
+Seeds users, reminders and places, then drives /api/reminders, /api/nearby_places,
+/api/record_notification and /api/settings either in-process through the Flask test
+client or over HTTP against gunicorn, and reports throughput, p50/p95/p99 latency
+and SQL queries per request. Place lookups use the synthetic provider, so no Places
+API access is needed.
+
+Nearby requests are measured twice: nearby_warm goes to positions seeded as already
+fetched from upstream, so it is answered from the seeded places, and nearby_cold goes
+to positions that were never fetched, so it calls the provider.
+
+    python benchmarks/api_bench.py --users 20 --reminders 200 --places 5000
+    python benchmarks/api_bench.py --mode gunicorn --workers 4 --concurrency 16
+    python benchmarks/api_bench.py --mode gunicorn --worker-class sync --concurrency 16
+    python benchmarks/api_bench.py --database-url postgresql://localhost/vam_bench
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Center of the seeded area and how far places and positions spread from it, in degrees
+CENTER = (51.5074, -0.1278)
+SPREAD = 0.05
+
+ENDPOINTS = ("get_reminders", "nearby_warm", "nearby_cold", "record_notification", "settings")
+
+# Largest search radius the settings requests set; seeded lookups cover it
+MAX_RADIUS = 1500
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to seed (default: a fresh SQLite file)")
+    parser.add_argument("--mode", choices=("testclient", "gunicorn"), default="testclient")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--reminders", type=int, default=100, help="Reminders per user")
+    parser.add_argument("--places", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads in gunicorn mode")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--worker-class", choices=("sync", "gthread", "gevent"), default="gthread")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gthread worker (sync workers always use 1)")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency", type=float, default=0.05, help="Synthetic Places API latency in seconds")
+    parser.add_argument("--no-force", action="store_true",
+                        help="Let the movement throttle short-circuit repeated nearby requests")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop and recreate all tables before seeding (always done for the default SQLite file)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    # gunicorn turns sync workers with more than one thread into gthread workers
+    if args.worker_class == "sync":
+        args.threads = 1
+    return args
+
+
+def configure_environment(args):
+    if not args.database_url:
+        handle, path = tempfile.mkstemp(prefix="vam-bench-", suffix=".db")
+        os.close(handle)
+        args.database_url = f"sqlite:///{path}"
+        args.reset = True
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["PLACES_PROVIDER"] = "synthetic"
+    os.environ["SYNTHETIC_PLACES_LATENCY"] = str(args.latency)
+    os.environ["SYNTHETIC_PLACES_SEED"] = str(args.seed)
+    # gunicorn workers report their SQL statement count in the X-Query-Count header
+    if args.mode == "gunicorn":
+        os.environ["PROFILING_ENABLED"] = "true"
+    sys.path.insert(0, ROOT)
+
+
+def seed_database(app, db, args):
+    """Create users, reminders and places and return the ids needed to build requests"""
+    from sqlalchemy import insert
+    from models import Category, Place, PlaceLookup, Reminder, User
+    from services.place_store import lookup_tile
+
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        import routes
+        routes.initialize_database()
+        routes.category_registry.invalidate()
+
+        category_ids = [category.id for category in db.session.query(Category).all()]
+        now = datetime.utcnow()
+
+        db.session.execute(insert(User), [
+            {
+                "username": f"bench{index}",
+                "email": f"bench{index}@example.com",
+                "password_hash": "bench",
+                "search_radius": 1000,
+                "notification_enabled": True,
+                "created_at": now,
+            }
+            for index in range(args.users)
+        ])
+        users = {
+            user.username: user.id
+            for user in db.session.query(User).filter(User.username.like("bench%")).all()
+        }
+
+        db.session.execute(insert(Reminder), [
+            {
+                "title": f"Reminder {index}",
+                "description": "Seeded by the benchmark",
+                "user_id": user_id,
+                "category_id": rng.choice(category_ids),
+                "completed": rng.random() < 0.2,
+                "created_at": now,
+            }
+            for user_id in users.values()
+            for index in range(args.reminders)
+        ])
+
+        db.session.execute(insert(Place), [
+            {
+                "place_id": f"bench-place-{index}",
+                "name": f"Place {index}",
+                "category_id": rng.choice(category_ids),
+                "latitude": CENTER[0] + rng.uniform(-SPREAD, SPREAD),
+                "longitude": CENTER[1] + rng.uniform(-SPREAD, SPREAD),
+                "address": "Benchmark Road",
+                "last_updated": now,
+            }
+            for index in range(args.places)
+        ])
+
+        # Positions whose lookups were fetched from upstream, one per warm request so each
+        # one misses the in-memory cache and is served from the seeded places
+        warm_positions = [
+            (CENTER[0] + rng.uniform(-SPREAD, SPREAD), CENTER[1] + rng.uniform(-SPREAD, SPREAD))
+            for _ in range(args.requests)
+        ]
+        lookups = {
+            (lookup_tile(latitude, longitude), category_id)
+            for latitude, longitude in warm_positions
+            for category_id in category_ids
+        }
+        db.session.execute(insert(PlaceLookup), [
+            {"tile": tile, "radius": MAX_RADIUS, "category_id": category_id, "fetched_at": now}
+            for tile, category_id in lookups
+        ])
+        db.session.commit()
+
+        reminders_by_user = {}
+        for reminder_id, user_id in db.session.query(Reminder.id, Reminder.user_id).all():
+            reminders_by_user.setdefault(user_id, []).append(reminder_id)
+        place_ids = [place_id for (place_id,) in db.session.query(Place.id).all()]
+
+    return {
+        "users": users,
+        "reminders_by_user": reminders_by_user,
+        "place_ids": place_ids,
+        "warm_positions": warm_positions,
+    }
+
+
+def build_requests(seeded, args):
+    """Build the requests for each endpoint as (username, method, path, json) tuples"""
+    rng = random.Random(args.seed + 1)
+    usernames = list(seeded["users"])
+    plan = {endpoint: [] for endpoint in ENDPOINTS}
+
+    for index in range(args.requests):
+        username = usernames[index % len(usernames)]
+        user_id = seeded["users"][username]
+
+        plan["get_reminders"].append((username, "GET", "/api/reminders", None))
+
+        latitude, longitude = seeded["warm_positions"][index]
+        plan["nearby_warm"].append((username, "POST", "/api/nearby_places", {
+            "latitude": latitude,
+            "longitude": longitude,
+            "force": not args.no_force,
+        }))
+
+        plan["nearby_cold"].append((username, "POST", "/api/nearby_places", {
+            "latitude": CENTER[0] + rng.uniform(-SPREAD, SPREAD),
+            "longitude": CENTER[1] + rng.uniform(-SPREAD, SPREAD),
+            "force": not args.no_force,
+        }))
+
+        plan["record_notification"].append((username, "POST", "/api/record_notification", {
+            "reminder_id": rng.choice(seeded["reminders_by_user"][user_id]),
+            "place_id": rng.choice(seeded["place_ids"]),
+        }))
+
+        if index % 2:
+            plan["settings"].append((username, "PUT", "/api/settings", {"search_radius": rng.choice((500, 1000, MAX_RADIUS))}))
+        else:
+            plan["settings"].append((username, "GET", "/api/settings", None))
+
+    return plan
+
+
+def summarize(endpoint, samples, elapsed):
+    latencies = sorted(sample["latency"] for sample in samples)
+    queries = [sample["queries"] for sample in samples if sample["queries"] is not None]
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+    return {
+        "endpoint": endpoint,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "queries_per_request": statistics.mean(queries) if queries else None,
+    }
+
+
+def run_testclient(app, db, plan):
+    """Send requests one at a time in-process and count SQL statements per request"""
+    from sqlalchemy import event
+
+    counter = {"queries": 0}
+
+    def count_query(*_):
+        counter["queries"] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count_query)
+
+    client = app.test_client()
+    results = []
+    try:
+        for endpoint, requests in plan.items():
+            samples = []
+            started = time.perf_counter()
+            for username, method, path, body in requests:
+                with client.session_transaction() as session:
+                    session["username"] = username
+
+                counter["queries"] = 0
+                request_started = time.perf_counter()
+                response = client.open(path, method=method, json=body)
+                samples.append({
+                    "latency": time.perf_counter() - request_started,
+                    "status": response.status_code,
+                    "queries": counter["queries"],
+                })
+            results.append(summarize(endpoint, samples, time.perf_counter() - started))
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+
+    return results
+
+
+def start_gunicorn(args):
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--bind", f"127.0.0.1:{args.port}",
+        "--config", os.path.join(ROOT, "gunicorn.conf.py"),
+        "--workers", str(args.workers),
+        "--worker-class", args.worker_class,
+        "--threads", str(args.threads),
+        "--log-level", "warning",
+        "main:app",
+    ]
+    server = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ))
+
+    import requests
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{args.port}/api/categories", timeout=5)
+            return server
+        except requests.RequestException:
+            if server.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup")
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError("gunicorn did not start within 30 seconds")
+
+
+def run_gunicorn(app, plan, args):
+    """Send requests over HTTP from concurrent client threads"""
+    import requests
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    cookie_name = app.config["SESSION_COOKIE_NAME"]
+    local = threading.local()
+
+    def send(request):
+        username, method, path, body = request
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+
+        request_started = time.perf_counter()
+        response = local.session.request(
+            method,
+            f"http://127.0.0.1:{args.port}{path}",
+            json=body,
+            cookies={cookie_name: serializer.dumps({"username": username})},
+        )
+        query_count = response.headers.get("X-Query-Count")
+        return {
+            "latency": time.perf_counter() - request_started,
+            "status": response.status_code,
+            "queries": int(query_count) if query_count is not None else None,
+        }
+
+    server = start_gunicorn(args)
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for endpoint, requests_for_endpoint in plan.items():
+                started = time.perf_counter()
+                samples = list(pool.map(send, requests_for_endpoint))
+                results.append(summarize(endpoint, samples, time.perf_counter() - started))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    return results
+
+
+def print_results(results, args):
+    if args.mode == "gunicorn":
+        print(f"\nworkers={args.workers} worker-class={args.worker_class} threads={args.threads}", end="")
+    print(f"\nmode={args.mode} users={args.users} reminders/user={args.reminders} "
+          f"places={args.places} requests/endpoint={args.requests}")
+    print(f"{'endpoint':<22}{'req':>6}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}")
+    for result in results:
+        queries = result["queries_per_request"]
+        print(
+            f"{result['endpoint']:<22}{result['requests']:>6}{result['errors']:>6}"
+            f"{result['throughput']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{'n/a' if queries is None else round(queries, 2):>10}"
+        )
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    from app import app, db
+    import main as _  # registers models and routes
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    seeded = seed_database(app, db, args)
+    plan = build_requests(seeded, args)
+
+    if args.mode == "testclient":
+        results = run_testclient(app, db, plan)
+    else:
+        results = run_gunicorn(app, plan, args)
+
+    print_results(results, args)
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"args": vars(args), "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Measure how long the app takes to start and how much database work that does.
+
+Each run imports main in a fresh interpreter and reports the import time and the
+number of database connections and SQL statements made while importing, which
+should be zero. With --gunicorn it also times how long gunicorn takes from launch
+until a worker answers an HTTP request.
+
+    python benchmarks/startup_bench.py --runs 10
+    python benchmarks/startup_bench.py --gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so every import is cold
+IMPORT_PROBE = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+counts = {"connections": 0, "statements": 0}
+event.listen(Pool, "connect", lambda *_: counts.__setitem__("connections", counts["connections"] + 1))
+event.listen(Engine, "before_cursor_execute", lambda *_: counts.__setitem__("statements", counts["statements"] + 1))
+
+started = time.perf_counter()
+import main
+counts["import_seconds"] = time.perf_counter() - started
+print(json.dumps(counts))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database the app points at (default: an empty SQLite file)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gunicorn", action="store_true", help="Also time gunicorn until it answers requests")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def environment(args):
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(prefix="vam-startup-", suffix=".db")
+        os.close(handle)
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+    return env
+
+
+def measure_import(env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_gunicorn(env, args):
+    """Seconds from launching gunicorn until a worker answers an HTTP request
+
+    The arbiter accepts connections before any worker has booted, so the port being
+    open is not enough; any response, even an error, means a worker is serving.
+    """
+    import requests
+
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--config", os.path.join(ROOT, "gunicorn.conf.py"),
+        "--bind", f"127.0.0.1:{args.port}",
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+        "main:app",
+    ]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    try:
+        while time.perf_counter() - started < 30:
+            try:
+                requests.get(f"http://127.0.0.1:{args.port}/api/categories", timeout=5)
+                return time.perf_counter() - started
+            except requests.RequestException:
+                if server.poll() is not None:
+                    raise RuntimeError("gunicorn exited during startup")
+                time.sleep(0.01)
+        raise RuntimeError("gunicorn did not start within 30 seconds")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    args = parse_args()
+    env = environment(args)
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    import_seconds = [run["import_seconds"] for run in imports]
+    results = {
+        "import_median_ms": statistics.median(import_seconds) * 1000,
+        "import_max_ms": max(import_seconds) * 1000,
+        "connections": max(run["connections"] for run in imports),
+        "statements": max(run["statements"] for run in imports),
+    }
+    print(f"import main: median {results['import_median_ms']:.1f}ms, max {results['import_max_ms']:.1f}ms, "
+          f"{results['connections']} DB connections, {results['statements']} SQL statements")
+
+    if args.gunicorn:
+        boots = [measure_gunicorn(env, args) for _ in range(args.runs)]
+        results["gunicorn_median_ms"] = statistics.median(boots) * 1000
+        print(f"gunicorn ({args.workers} workers) answering requests: median {results['gunicorn_median_ms']:.1f}ms")
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"args": vars(args), "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
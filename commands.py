@@ -0,0 +1,65 @@
+import logging
+import click
+from app import app, db
+import migrations
+import routes
+
+logger = logging.getLogger(__name__)
+
+def init_database():
+    """Create missing tables, apply migrations and seed the default data"""
+    db.create_all()
+    applied = migrations.run_migrations()
+    routes.initialize_database()
+    logger.info("Database initialized")
+    return applied
+
+@app.cli.command("init-db")
+def init_db():
+    """Create and migrate the schema and seed default data; run once per deploy."""
+    for change in init_database():
+        click.echo(f"Applied {change}")
+    click.echo("Database initialized")
+
+@app.cli.command("prefetch")
+@click.option("--once", is_flag=True, help="Run a single scan and refresh pass, then exit.")
+def prefetch(once):
+    """Refresh stale places for the busiest tiles without the web server."""
+    worker = routes.build_prefetch_worker(find_stale=routes.find_stale_stored_tiles)
+    
+    if once:
+        worker.run_once()
+        click.echo(f"Prefetch finished: {worker.stats()}")
+        return
+    
+    click.echo("Prefetch worker running, press Ctrl+C to stop")
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+@app.cli.command("migrate")
+def migrate():
+    """Bring an existing database up to date with the models."""
+    applied = migrations.run_migrations()
+    if applied:
+        for change in applied:
+            click.echo(f"Applied {change}")
+    else:
+        click.echo("Database is up to date")
+
+
+@app.cli.command("explain-check")
+@click.option("--verbose", is_flag=True, help="Print the full plan of every query.")
+def explain_check(verbose):
+    """Verify with EXPLAIN that the hot queries use their indexes."""
+    failures = 0
+    for description, index_name, plan, uses_index in migrations.check_query_plans():
+        click.echo(f"{'ok' if uses_index else 'MISSING'}  {description} ({index_name})")
+        if verbose or not uses_index:
+            click.echo("    " + plan.replace("\n", "\n    "))
+        failures += not uses_index
+    
+    if failures:
+        raise click.ClickException(f"{failures} hot queries do not use their index")
@@ -1,39 +1,78 @@
 import os
 import logging
+import threading
+from functools import partial
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from services.fanout import FanOut
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
+# Seconds a Supabase request may take overall and to connect
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", 3))
 
-if not supabase_url or not supabase_key:
-    logger.error("Supabase URL or key not found in environment variables")
-    raise ValueError("Supabase URL or key not found in environment variables")
+# Supabase client shared by this module and supabase_helper, created on first use so
+# importing either module does no network or configuration work
+_supabase = None
+_supabase_lock = threading.Lock()
 
-try:
-    supabase: Client = create_client(supabase_url, supabase_key)
-    logger.info("Supabase client initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing Supabase client: {e}")
-    raise
+def get_supabase() -> Client:
+    """Get the shared Supabase client, creating it on first use"""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                supabase_url = os.getenv("SUPABASE_URL")
+                supabase_key = os.getenv("SUPABASE_KEY")
+                
+                if not supabase_url or not supabase_key:
+                    logger.error("Supabase URL or key not found in environment variables")
+                    raise ValueError("Supabase URL or key not found in environment variables")
+                
+                try:
+                    # One client means one pooled HTTP session whose connections are kept alive
+                    _supabase = create_client(supabase_url, supabase_key, options=ClientOptions(
+                        postgrest_client_timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT)
+                    ))
+                    logger.info("Supabase client initialized successfully")
+                except Exception as e:
+                    logger.error(f"Error initializing Supabase client: {e}")
+                    raise
+    return _supabase
+
+# Independent Supabase requests run side by side on this pool instead of one after another
+_fanout = FanOut(max_workers=int(os.getenv("SUPABASE_MAX_WORKERS", 8)))
+
+def run_concurrently(calls):
+    """Run a dict of key -> callable concurrently and return key -> result, raising the first error"""
+    results, errors, timed_out = _fanout.run(calls, SUPABASE_TIMEOUT)
+    if errors:
+        raise next(iter(errors.values()))
+    if timed_out:
+        raise TimeoutError(f"Supabase requests timed out: {', '.join(map(str, timed_out))}")
+    return results
+
+def count_rows(table):
+    """Count the rows of a table without fetching them"""
+    response = get_supabase().table(table).select("*", count="exact", head=True).execute()
+    return response.count or 0
 
 def initialize_database():
     """Initialize database tables and default data if they don't exist"""
     try:
         # Create tables if they don't exist
-        create_tables()
+        counts = create_tables()
         
-        # Add default categories if they don't exist
-        initialize_categories()
-        
-        # Add a test user if no users exist
-        create_test_user()
+        # Add default categories and a test user if none exist
+        run_concurrently({
+            "categories": partial(initialize_categories, counts["categories"]),
+            "users": partial(create_test_user, counts["users"])
+        })
         
         logger.info("Database initialized successfully")
     except Exception as e:
@@ -41,18 +80,15 @@ def initialize_database():
         raise
 
 def create_tables():
-    """Create database tables if they don't exist"""
+    """Check that the database tables exist and return their row counts"""
     try:
-        # You can use Supabase's SQL execution capability to create tables
-        # This is typically done in the Supabase dashboard, but we can also do it here
-        
-        # Check if tables exist
-        users_exist = supabase.table("users").select("count", count="exact").execute()
-        categories_exist = supabase.table("categories").select("count", count="exact").execute()
-        reminders_exist = supabase.table("reminders").select("count", count="exact").execute()
-        places_exist = supabase.table("places").select("count", count="exact").execute()
+        # Tables are created in the Supabase dashboard; counting rows verifies they exist
+        counts = run_concurrently({
+            table: partial(count_rows, table) for table in ("users", "categories", "reminders", "places")
+        })
         
         logger.info("Tables verified in Supabase")
+        return counts
     except Exception as e:
         logger.error(f"Error checking tables: {e}")
         # Tables might not exist yet, which would cause an error
@@ -60,15 +96,15 @@ def create_tables():
         logger.error("Make sure tables are created in Supabase dashboard")
         raise
 
-def initialize_categories():
+def initialize_categories(count=None):
     """Initialize default categories if they don't exist"""
     try:
         # Check if any categories exist
-        response = supabase.table("categories").select("count", count="exact").execute()
-        count = response.count if hasattr(response, 'count') else 0
+        if count is None:
+            count = count_rows("categories")
         
         if count == 0:
-            # Add default categories
+            # Add default categories in one request
             categories = [
                 {"name": "Grocery", "google_places_type": "grocery_or_supermarket", "icon": "cart-shopping"},
                 {"name": "Pharmacy", "google_places_type": "pharmacy", "icon": "prescription-bottle-medical"},
@@ -77,20 +113,19 @@ def initialize_categories():
                 {"name": "Convenience Store", "google_places_type": "convenience_store", "icon": "store"}
             ]
             
-            for category in categories:
-                supabase.table("categories").insert(category).execute()
-                
+            get_supabase().table("categories").insert(categories).execute()
+            
             logger.info("Default categories created")
     except Exception as e:
         logger.error(f"Error initializing categories: {e}")
         raise
 
-def create_test_user():
+def create_test_user(count=None):
     """Create a test user if no users exist"""
     try:
         # Check if any users exist
-        response = supabase.table("users").select("count", count="exact").execute()
-        count = response.count if hasattr(response, 'count') else 0
+        if count is None:
+            count = count_rows("users")
         
         if count == 0:
             # Add test user
@@ -103,8 +138,8 @@ def create_test_user():
                 "created_at": "now()"
             }
             
-            supabase.table("users").insert(test_user).execute()
+            get_supabase().table("users").insert(test_user).execute()
             logger.info("Test user created")
     except Exception as e:
         logger.error(f"Error creating test user: {e}")
-        raise
\ No newline at end of file
+        raise
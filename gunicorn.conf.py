@@ -0,0 +1,58 @@
+# gunicorn configuration, loaded automatically from the working directory.
+#
+# The nearby endpoints spend most of their time waiting on the Places API and the
+# database, so a worker should serve many requests at once instead of one:
+#
+#   GUNICORN_WORKER_CLASS=gthread (default)  each worker runs GUNICORN_THREADS request threads
+#   GUNICORN_WORKER_CLASS=gevent             each worker runs up to GUNICORN_WORKER_CONNECTIONS
+#                                            greenlets; needs `pip install gevent psycogreen`
+#   GUNICORN_WORKER_CLASS=sync               one request per worker, as before
+#
+# Worker processes come from WEB_CONCURRENCY. The database pool of each worker is sized
+# to its concurrency through DB_POOL_SIZE, and the thread pool for concurrent Places API
+# lookups to its concurrency times NEARBY_LOOKUPS_PER_REQUEST (one lookup per category,
+# 5 by default) through NEARBY_MAX_WORKERS, unless those are set explicitly. A smaller
+# pool makes concurrent nearby requests queue behind each other's upstream calls.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+# gunicorn quietly switches sync workers with more than one thread to gthread
+threads = 1 if worker_class == "sync" else int(os.environ.get("GUNICORN_THREADS", 8))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 100))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+
+def post_fork(server, worker):
+    worker_type = server.cfg.worker_class_str
+
+    # Requests a worker can have in flight, which is how many database connections it may
+    # need. Greenlets mostly wait on the Places API, so they share a smaller pool. The app is
+    # imported after the fork, so it still sees this unless preload_app is set.
+    if worker_type == "gevent":
+        concurrency = server.cfg.worker_connections
+        db_connections = min(concurrency, 20)
+    elif worker_type == "gthread":
+        concurrency = db_connections = server.cfg.threads
+    else:
+        concurrency = db_connections = 1
+    os.environ.setdefault("DB_POOL_SIZE", str(db_connections))
+
+    # Every request in flight may fan out one Places API lookup per category at once
+    lookups_per_request = int(os.environ.get("NEARBY_LOOKUPS_PER_REQUEST", 5))
+    os.environ.setdefault("NEARBY_MAX_WORKERS", str(concurrency * lookups_per_request))
+
+    # psycopg2 blocks the whole gevent worker while it waits on the database unless it is
+    # patched to yield to other greenlets
+    if worker_type != "gevent":
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen is not installed; database calls will block the gevent worker")
+        return
+    patch_psycopg()
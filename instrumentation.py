@@ -0,0 +1,188 @@
+import cProfile
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds and in statements per request
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in the Prometheus text format"""
+
+    def __init__(self, name, help_text, buckets, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                label_text = ",".join(
+                    f'{name}="{value}"' for name, value in zip(self.label_names, labels)
+                )
+                prefix = f"{label_text}," if label_text else ""
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+                lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return "\n".join(lines)
+
+
+request_duration = Histogram(
+    "vam_request_duration_seconds", "Total request time.", DURATION_BUCKETS, ("endpoint", "status")
+)
+phase_duration = Histogram(
+    "vam_request_phase_seconds", "Time spent per request phase.", DURATION_BUCKETS, ("endpoint", "phase")
+)
+sql_duration = Histogram(
+    "vam_request_sql_seconds", "Total SQL time per request.", DURATION_BUCKETS, ("endpoint",)
+)
+sql_statements = Histogram(
+    "vam_request_sql_statements", "SQL statements per request.", COUNT_BUCKETS, ("endpoint",)
+)
+
+HISTOGRAMS = (request_duration, phase_duration, sql_duration, sql_statements)
+
+
+@contextmanager
+def phase(name):
+    """Time a block as a named phase of the current request; a no-op when not instrumented"""
+    if not has_request_context() or "instrumentation" not in g:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.instrumentation["phases"]
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    if has_request_context() and "instrumentation" in g:
+        g.instrumentation["sql_count"] += 1
+        g.instrumentation["sql_time"] += time.perf_counter() - started
+
+
+def _start_request():
+    g.instrumentation = {
+        "started": time.perf_counter(),
+        "sql_count": 0,
+        "sql_time": 0.0,
+        "phases": {},
+        "profiler": None,
+    }
+    if _config["cprofile"]:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        g.instrumentation["profiler"] = profiler
+
+
+def _finish_request(response):
+    state = g.pop("instrumentation", None)
+    if state is None:
+        return response
+
+    elapsed = time.perf_counter() - state["started"]
+    profiler = state["profiler"]
+    if profiler is not None:
+        profiler.disable()
+
+    endpoint = request.endpoint or "unknown"
+    request_duration.observe(elapsed, endpoint, str(response.status_code))
+    sql_duration.observe(state["sql_time"], endpoint)
+    sql_statements.observe(state["sql_count"], endpoint)
+
+    # Whatever is not SQL or a named phase is attributed to Python
+    phases = dict(state["phases"])
+    phases["sql"] = state["sql_time"]
+    phases["python"] = max(elapsed - sum(phases.values()), 0.0)
+    for name, duration in phases.items():
+        phase_duration.observe(duration, endpoint, name)
+
+    response.headers["X-Query-Count"] = str(state["sql_count"])
+    response.headers["Server-Timing"] = ", ".join(
+        f"{name};dur={duration * 1000:.2f}" for name, duration in phases.items()
+    ) + f", total;dur={elapsed * 1000:.2f}"
+
+    if elapsed >= _config["slow_request"]:
+        logger.warning(
+            f"Slow request {request.method} {request.path}: {elapsed * 1000:.0f}ms, "
+            f"{state['sql_count']} SQL statements, phases {phases}"
+        )
+        if profiler is not None:
+            _dump_profile(profiler, endpoint)
+
+    return response
+
+
+def _dump_profile(profiler, endpoint):
+    os.makedirs(_config["dump_dir"], exist_ok=True)
+    path = os.path.join(_config["dump_dir"], f"{endpoint}-{int(time.time() * 1000)}.prof")
+    profiler.dump_stats(path)
+    logger.warning(f"Wrote profile to {path}")
+
+
+def render_metrics():
+    """All histograms in the Prometheus text exposition format"""
+    return "\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+
+
+_config = {}
+
+
+def init_instrumentation(app):
+    """Register the request hooks, SQL listeners and /metrics when PROFILING_ENABLED is set"""
+    if not app.config["PROFILING_ENABLED"] or "metrics" in app.view_functions:
+        return
+
+    _config.update(
+        cprofile=app.config["PROFILING_CPROFILE"],
+        slow_request=app.config["PROFILING_SLOW_REQUEST"],
+        dump_dir=app.config["PROFILING_DUMP_DIR"],
+    )
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    @app.route("/metrics")
+    def metrics():
+        return render_metrics(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+    logger.info("Request instrumentation enabled")
@@ -1,31 +1,30 @@
 # main.py
-import os
 import logging
-from app import app, db
-import models
+import app as application
+from instrumentation import init_instrumentation
+from response_encoding import init_response_encoding
 
 # Set up logging for debugging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Debug: Print directory contents
-logger.debug(f"Current working directory: {os.getcwd()}")
-logger.debug(f"Directory contents: {os.listdir('.')}")
-logger.debug(f"Services directory contents: {os.listdir('services')}")
+# Assemble the app from its models, routes, CLI commands, instrumentation and response encoding.
+# Nothing here touches the database, so workers boot without any round-trips;
+# tables, migrations and seed data are set up once per deploy by `flask init-db`.
+def create_app():
+    # Import routes after models to avoid circular imports
+    import models
+    import routes
+    import commands
 
-# Import routes after models to avoid circular imports
-import routes
+    init_instrumentation(application.app)
+    init_response_encoding(application.app)
+    return application.app
 
-# Initialize the database
-with app.app_context():
-    try:
-        db.create_all()
-        logger.info("Database tables created successfully")
-        # Initialize database with sample data
-        routes.initialize_database()
-    except Exception as e:
-        logger.error(f"Error during database initialization: {e}")
+app = create_app()
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
+    import commands
+    with app.app_context():
+        commands.init_database()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select, update
+from app import db
+from models import NotificationHistory, Place, Reminder
+
+logger = logging.getLogger(__name__)
+
+# Create tables declared on the models that do not exist yet
+def create_missing_tables(connection):
+    existing_tables = set(inspect(connection).get_table_names())
+    missing = [table for table in db.metadata.sorted_tables if table.name not in existing_tables]
+    db.metadata.create_all(connection, tables=missing)
+    return [table.name for table in missing]
+
+# Add nullable columns declared on the models that existing tables do not have yet
+def add_missing_columns(connection):
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Cannot add non-nullable column {table.name}.{column.name} automatically")
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            added.append(f"{table.name}.{column.name}")
+    
+    return added
+
+# Reminders that predate delta sync count as last updated when they were completed or created
+def backfill_reminder_updated_at(connection):
+    result = connection.execute(
+        update(Reminder.__table__)
+        .where(Reminder.updated_at.is_(None))
+        .values(updated_at=func.coalesce(Reminder.completed_at, Reminder.created_at))
+    )
+    return [f"reminders.updated_at for {result.rowcount} rows"] if result.rowcount else []
+
+# Create indexes declared on the models that an existing database does not have yet.
+# db.create_all() only creates missing tables, so indexes added later need this.
+def create_missing_indexes(connection):
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+    
+    return created
+
+# Schema changes in the order they are applied; each one is safe to run again
+MIGRATIONS = [
+    ("create_missing_tables", create_missing_tables),
+    ("add_missing_columns", add_missing_columns),
+    ("backfill_reminder_updated_at", backfill_reminder_updated_at),
+    ("create_missing_indexes", create_missing_indexes),
+]
+
+def run_migrations():
+    """Apply all migrations and return the names of the changes made"""
+    applied = []
+    with db.engine.begin() as connection:
+        for name, migration in MIGRATIONS:
+            changes = migration(connection)
+            for change in changes:
+                logger.info(f"Migration {name}: {change}")
+            applied.extend(changes)
+    return applied
+
+# The hot filters in routes.py and the index each one should use
+def hot_queries():
+    since = datetime.utcnow()
+    return [
+        (
+            "active reminders for a user",
+            select(Reminder).where(Reminder.user_id == 1, Reminder.completed.is_(False)),
+            "ix_reminders_user_id_completed",
+        ),
+        (
+            "reminders changed since a sync",
+            select(Reminder).where(Reminder.user_id == 1, Reminder.updated_at > since),
+            "ix_reminders_user_id_updated_at",
+        ),
+        (
+            "notifications of a reminder",
+            select(NotificationHistory).where(NotificationHistory.reminder_id == 1),
+            "ix_notification_history_reminder_id",
+        ),
+        (
+            "recent notifications for a user",
+            select(NotificationHistory.reminder_id, NotificationHistory.place_id, NotificationHistory.sent_at)
+            .where(NotificationHistory.user_id == 1, NotificationHistory.sent_at >= since),
+            "ix_notification_history_user_id_sent_at",
+        ),
+        (
+            "places of a category",
+            select(Place).where(Place.category_id == 1),
+            "ix_places_category_id",
+        ),
+        (
+            "places in a bounding box",
+            select(Place).where(Place.latitude.between(51.0, 52.0), Place.longitude.between(-1.0, 0.0)),
+            "ix_places_latitude_longitude",
+        ),
+        (
+            "stale places",
+            select(Place.latitude, Place.longitude, Place.category_id)
+            .where(Place.last_updated < since, Place.category_id.isnot(None))
+            .order_by(Place.last_updated)
+            .limit(100),
+            "ix_places_last_updated",
+        ),
+    ]
+
+def explain(connection, statement):
+    """Return the query plan of a statement as text"""
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    
+    def add_prefix(conn, cursor, sql, parameters, context, executemany):
+        return prefix + sql, parameters
+    
+    event.listen(connection, "before_cursor_execute", add_prefix, retval=True)
+    try:
+        rows = connection.execute(statement).fetchall()
+    finally:
+        event.remove(connection, "before_cursor_execute", add_prefix)
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+def check_query_plans():
+    """EXPLAIN each hot query and return (description, expected index, plan, uses index) tuples"""
+    results = []
+    with db.engine.connect() as connection:
+        # Small tables are scanned sequentially no matter what, so make the planner show
+        # which index it would pick once the table is large enough
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+        
+        for description, statement, index_name in hot_queries():
+            plan = explain(connection, statement)
+            results.append((description, index_name, plan, index_name in plan))
+        
+        connection.rollback()
+    return results
@@ -36,6 +36,12 @@ class Category(db.Model):
 
 class Reminder(db.Model):
     __tablename__ = "reminders"
+    __table_args__ = (
+        # Active reminders per user for the index page and nearby checks
+        db.Index("ix_reminders_user_id_completed", "user_id", "completed"),
+        # Changed reminders per user for delta sync
+        db.Index("ix_reminders_user_id_updated_at", "user_id", "updated_at"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
@@ -45,6 +51,7 @@ class Reminder(db.Model):
     completed = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="reminders")
@@ -53,8 +60,30 @@ class Reminder(db.Model):
     def __repr__(self):
         return f"<Reminder {self.title}>"
 
+# Left behind by deleted reminders so delta sync can report them
+class ReminderTombstone(db.Model):
+    __tablename__ = "reminder_tombstones"
+    __table_args__ = (
+        db.Index("ix_reminder_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    reminder_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ReminderTombstone {self.reminder_id}>"
+
 class Place(db.Model):
     __tablename__ = "places"
+    __table_args__ = (
+        # Bounding-box lookups for radius queries
+        db.Index("ix_places_latitude_longitude", "latitude", "longitude"),
+        db.Index("ix_places_category_id", "category_id"),
+        # Oldest places first for the prefetch command
+        db.Index("ix_places_last_updated", "last_updated"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     place_id = db.Column(db.String(128), nullable=False, unique=True)
@@ -71,8 +100,30 @@ class Place(db.Model):
     def __repr__(self):
         return f"<Place {self.name}>"
 
+# Nearby lookups answered by the Places API; stored places are only served for areas fetched this way
+class PlaceLookup(db.Model):
+    __tablename__ = "place_lookups"
+    __table_args__ = (
+        db.UniqueConstraint("tile", "radius", "category_id", name="uq_place_lookups_tile_radius_category_id"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tile = db.Column(db.String(12), nullable=False)  # geohash of the lookup position
+    radius = db.Column(db.Integer, nullable=False)  # radius in meters
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=False)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PlaceLookup {self.tile} {self.radius}m category {self.category_id}>"
+
 class NotificationHistory(db.Model):
     __tablename__ = "notification_history"
+    __table_args__ = (
+        # Deleting a reminder removes its notifications
+        db.Index("ix_notification_history_reminder_id", "reminder_id"),
+        # Recent notifications per user, newest first with id as a tiebreaker
+        db.Index("ix_notification_history_user_id_sent_at", "user_id", "sent_at", "id"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
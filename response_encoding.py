@@ -0,0 +1,138 @@
+import gzip
+import logging
+from flask import current_app, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional faster JSON, MessagePack and Brotli support; each is used only when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MIMETYPE = "application/json"
+COLUMNAR_MIMETYPE = "application/vnd.vam.columnar+json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+COMPRESSIBLE_MIMETYPES = {JSON_MIMETYPE, COLUMNAR_MIMETYPE, MSGPACK_MIMETYPE, "text/html", "text/plain", "text/css", "application/javascript"}
+
+# Compact encodings round floats to this many decimals (about 0.1m for coordinates)
+FLOAT_DIGITS = 6
+
+def to_columnar(value):
+    """Rewrite lists of same-keyed dicts as {"columns": {key: [values]}, "length": n}, recursively.
+
+    Repeated keys are sent once per list instead of once per row, and floats are
+    rounded to FLOAT_DIGITS decimals. Anything else is kept as it is.
+    """
+    if isinstance(value, dict):
+        return {key: to_columnar(item) for key, item in value.items()}
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS)
+    if not isinstance(value, list):
+        return value
+
+    if value and all(isinstance(item, dict) for item in value):
+        keys = list(value[0])
+        if all(item.keys() == value[0].keys() for item in value):
+            return {
+                "columns": {key: [to_columnar(item[key]) for item in value] for key in keys},
+                "length": len(value)
+            }
+    return [to_columnar(item) for item in value]
+
+def negotiated_response(payload, status=200):
+    """Respond with JSON, columnar JSON or columnar MessagePack, as the Accept header prefers"""
+    offered = [JSON_MIMETYPE, COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+    mimetype = request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+
+    if mimetype == MSGPACK_MIMETYPE:
+        body = msgpack.packb(to_columnar(payload), use_bin_type=True)
+        response = current_app.response_class(body, status=status, mimetype=MSGPACK_MIMETYPE)
+    elif mimetype == COLUMNAR_MIMETYPE:
+        body = current_app.json.dumps(to_columnar(payload))
+        response = current_app.response_class(body, status=status, mimetype=COLUMNAR_MIMETYPE)
+    else:
+        response = jsonify(payload)
+        response.status_code = status
+
+    response.vary.add("Accept")
+    return response
+
+# Options that keep orjson's output equivalent to the default provider's: sorted keys,
+# non-string keys allowed and datetimes formatted by the provider as HTTP dates
+ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson, falling back to the default for custom options"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Debug mode pretty-prints, which orjson does not do the same way
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+# Compress successful responses above COMPRESSION_MIN_SIZE bytes with Brotli or gzip
+def compress_response(response):
+    if (
+        response.direct_passthrough
+        or not 200 <= response.status_code < 300
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config["COMPRESSION_MIN_SIZE"]:
+        return response
+
+    level = current_app.config["COMPRESSION_LEVEL"]
+    if brotli is not None and request.accept_encodings["br"]:
+        response.set_data(brotli.compress(data, quality=min(level, 11)))
+        response.headers["Content-Encoding"] = "br"
+    elif request.accept_encodings["gzip"]:
+        response.set_data(gzip.compress(data, compresslevel=min(level, 9)))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    # The compressed body is a different representation of the same resource
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_response_encoding(app):
+    """Use orjson for JSON when installed and compress responses when COMPRESSION_ENABLED is set"""
+    if orjson is not None and not isinstance(app.json, OrjsonProvider):
+        app.json = OrjsonProvider(app)
+        logger.info("Using orjson for JSON responses")
+
+    if app.config["COMPRESSION_ENABLED"] and compress_response not in app.after_request_funcs.get(None, []):
+        app.after_request(compress_response)
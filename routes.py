@@ -1,15 +1,147 @@
 import json
 import logging
+import math
+from dataclasses import replace
+from functools import partial
 from flask import render_template, request, jsonify, redirect, url_for, flash, session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from app import app, db
-from models import User, Category, Reminder, Place, NotificationHistory
-from services.google_places import get_nearby_places
-from services.location_service import calculate_distance
-from datetime import datetime
+from instrumentation import phase
+from response_encoding import negotiated_response
+from models import User, Category, Reminder, ReminderTombstone, Place, NotificationHistory
+from services.category_registry import CategoryInfo, CategoryRegistry
+from services.fanout import FanOut
+from services.movement_throttle import MovementThrottle
+from services.notification_dedup import NotificationDedup
+from services.pagination import decode_cursor, encode_cursor, parse_fields
+from services.prefetch import HotTileTracker, PrefetchWorker
+from services.upstream_guard import CircuitBreaker, QuotaBudget, UpstreamGuard
+from services.user_cache import UserCache, UserInfo
+from services.write_behind import WriteBehindBuffer
+from services.geo import geohash_encode
+from services.geofence import GeofenceEngine
+from services.place_cache import PlaceCache
+from services.place_providers import create_place_provider
+from services.place_store import find_covered_lookups, find_fresh_places, find_places_within, place_to_result, result_to_row, save_places
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Backend for place lookups, selected by PLACES_PROVIDER
+place_provider = create_place_provider(app.config)
+
+# Nearby places cache shared by all requests in this worker
+place_cache = PlaceCache(
+    max_entries=app.config["PLACES_CACHE_MAX_ENTRIES"],
+    ttl=app.config["PLACES_CACHE_TTL"],
+    precision=app.config["PLACES_CACHE_PRECISION"],
+)
+
+# Load categories for the registry
+def load_categories():
+    return [
+        CategoryInfo(
+            id=category.id,
+            name=category.name,
+            google_places_type=category.google_places_type,
+            icon=category.icon
+        )
+        for category in db.session.query(Category).all()
+    ]
+
+# Categories are static after seeding, so each worker keeps them in memory
+category_registry = CategoryRegistry(load_categories, ttl=app.config["CATEGORY_REGISTRY_TTL"])
+
+# Load a user and their settings for the user cache
+def load_user(username):
+    user = db.session.query(User).filter_by(username=username).first()
+    if not user:
+        return None
+    return UserInfo(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        search_radius=user.search_radius,
+        notification_enabled=user.notification_enabled
+    )
+
+user_cache = UserCache(load_user, ttl=app.config["USER_CACHE_TTL"])
+
+# Resolve the user for this request; there is no login yet, so it defaults to the test user
+def current_user():
+    return user_cache.get(session.get("username", "testuser"))
+
+# Last evaluated position and nearby result per user
+movement_throttle = MovementThrottle(
+    fraction=app.config["MOVEMENT_THRESHOLD_FRACTION"],
+    max_age=app.config["MOVEMENT_RESULT_MAX_AGE"],
+)
+
+# Load a user's recent notifications for the dedup memory
+def load_recent_notifications(user_id, since):
+    return (
+        db.session.query(
+            NotificationHistory.reminder_id,
+            NotificationHistory.place_id,
+            NotificationHistory.sent_at
+        )
+        .filter(NotificationHistory.user_id == user_id, NotificationHistory.sent_at >= since)
+        .all()
+    )
+
+notification_dedup = NotificationDedup(
+    load_recent_notifications,
+    cooldown=app.config["NOTIFICATION_COOLDOWN"],
+    max_entries=app.config["NOTIFICATION_DEDUP_MAX_ENTRIES"],
+)
+
+# Insert a batch of buffered notification history rows in one statement. If the batch is
+# rejected (say a reminder was deleted meanwhile) the rows are retried one at a time so
+# only the bad ones are lost.
+def insert_notifications(rows):
+    with app.app_context():
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(NotificationHistory), rows)
+            return
+        except IntegrityError as e:
+            logger.warning(f"Batch of {len(rows)} notifications rejected, inserting one at a time: {e}")
+        
+        for row in rows:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(insert(NotificationHistory), row)
+            except IntegrityError as e:
+                logger.error(f"Dropped notification {row}: {e}")
+
+# Optional write-behind buffer for notification history inserts
+notification_buffer = WriteBehindBuffer(
+    insert_notifications,
+    max_batch=app.config["NOTIFICATION_BUFFER_MAX_BATCH"],
+    interval=app.config["NOTIFICATION_BUFFER_INTERVAL"],
+    max_pending=app.config["NOTIFICATION_BUFFER_MAX_PENDING"],
+)
+if app.config["NOTIFICATION_BUFFER_ENABLED"]:
+    notification_buffer.start()
+
+# Demand per tile and category, used to pick what the prefetch worker refreshes
+hot_tiles = HotTileTracker(precision=app.config["PLACES_CACHE_PRECISION"])
+
+# Coalescing, quota and circuit breaker around Places API calls
+upstream_guard = UpstreamGuard(
+    CircuitBreaker(
+        failure_threshold=app.config["UPSTREAM_FAILURE_THRESHOLD"],
+        reset_timeout=app.config["UPSTREAM_RESET_TIMEOUT"],
+        slow_call=app.config["UPSTREAM_SLOW_CALL"],
+    ),
+    QuotaBudget(rate=app.config["UPSTREAM_QUOTA_RATE"], burst=app.config["UPSTREAM_QUOTA_BURST"]),
+)
+
+# Thread pool for concurrent per-category Places API lookups
+places_fanout = FanOut(max_workers=app.config["NEARBY_MAX_WORKERS"])
+
 # Initialize database with categories and test user
 def initialize_database():
     initialize_categories()
@@ -47,6 +179,7 @@ def initialize_categories():
             # Add categories to session
             db.session.add_all([grocery, pharmacy, shopping, restaurant, convenience])
             db.session.commit()
+            category_registry.invalidate()
             logger.info("Default categories created")
     except SQLAlchemyError as e:
         logger.error(f"Error initializing categories: {e}")
@@ -70,16 +203,375 @@ def create_test_user():
         logger.error(f"Error creating test user: {e}")
         db.session.rollback()
 
+# Fetch nearby places from the Places API through the upstream guard; runs on a fan-out worker thread. Returns (places, from_upstream). If upstream is unavailable or fails, stored
+# places of any age are returned instead; if there are none, the error is raised.
+def fetch_nearby_places(latitude, longitude, radius, category):
+    key = place_cache.key_for(latitude, longitude, radius, category.google_places_type)
+    
+    with app.app_context():
+        try:
+            places = upstream_guard.call(
+                key,
+                category.google_places_type,
+                partial(place_provider.get_nearby_places, latitude, longitude, radius, category.google_places_type)
+            )
+        except Exception as e:
+            stored = find_places_within(latitude, longitude, radius, category.id)
+            if not stored:
+                raise
+            logger.warning(f"Places API unavailable for category {category.name}, using stored places: {e}")
+            return [place_to_result(place) for _, place in stored], False
+    
+    return places, True
+
+# Reminder query with categories loaded in the same round-trip
+def reminders_query():
+    return db.session.query(Reminder).options(joinedload(Reminder.category))
+
+# Reminder fields available to API clients
+REMINDER_FIELDS = {
+    "id": lambda reminder: reminder.id,
+    "title": lambda reminder: reminder.title,
+    "description": lambda reminder: reminder.description,
+    "category_id": lambda reminder: reminder.category_id,
+    "category_name": lambda reminder: reminder.category.name,
+    "completed": lambda reminder: reminder.completed,
+    "created_at": lambda reminder: reminder.created_at.isoformat()
+}
+
+# Serialize a reminder for API responses, optionally only the requested fields
+def serialize_reminder(reminder, fields=None):
+    return {field: REMINDER_FIELDS[field](reminder) for field in fields or REMINDER_FIELDS}
+
+# Notification history fields available to API clients
+HISTORY_FIELDS = {
+    "id": lambda row: row.id,
+    "reminder_id": lambda row: row.reminder_id,
+    "reminder_title": lambda row: row.reminder_title,
+    "category_id": lambda row: row.category_id,
+    "place_id": lambda row: row.place_id,
+    "place_name": lambda row: row.place_name,
+    "sent_at": lambda row: row.sent_at.isoformat()
+}
+
+# Page size, decoded cursor and requested fields for a paginated listing; raises ValueError on bad input
+def parse_page_args(allowed_fields, cursor_size):
+    limit = request.args.get('limit', default=app.config["PAGE_SIZE_DEFAULT"], type=int)
+    limit = min(max(limit, 1), app.config["PAGE_SIZE_MAX"])
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor, cursor_size) if cursor else None
+    fields = parse_fields(request.args.get('fields'), allowed_fields)
+    return limit, after, fields
+
+# Optional true/false query parameter; raises ValueError on anything else
+def parse_bool_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError(f"Invalid value for {name}: {value}")
+
+# One page of a user's reminders in id order and the cursor of the next page, if any.
+# The category is only joined when its name is needed.
+def reminders_page(user_id, limit, after=None, completed=None, category_id=None, with_category=True):
+    query = reminders_query() if with_category else db.session.query(Reminder)
+    query = query.filter(Reminder.user_id == user_id)
+    if completed is not None:
+        query = query.filter(Reminder.completed == completed)
+    if category_id is not None:
+        query = query.filter(Reminder.category_id == category_id)
+    if after is not None:
+        query = query.filter(Reminder.id > int(after[0]))
+    
+    reminders = query.order_by(Reminder.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(reminders[limit - 1].id) if len(reminders) > limit else None
+    return reminders[:limit], next_cursor
+
+# One page of a user's notification history, newest first, and the cursor of the next page, if any
+def history_page(user_id, limit, after=None, reminder_id=None, category_id=None):
+    query = (
+        db.session.query(
+            NotificationHistory.id,
+            NotificationHistory.reminder_id,
+            Reminder.title.label("reminder_title"),
+            Reminder.category_id,
+            NotificationHistory.place_id,
+            Place.name.label("place_name"),
+            NotificationHistory.sent_at
+        )
+        .join(Reminder, NotificationHistory.reminder_id == Reminder.id)
+        .join(Place, NotificationHistory.place_id == Place.id)
+        .filter(NotificationHistory.user_id == user_id)
+    )
+    if reminder_id is not None:
+        query = query.filter(NotificationHistory.reminder_id == reminder_id)
+    if category_id is not None:
+        query = query.filter(Reminder.category_id == category_id)
+    if after is not None:
+        sent_at, history_id = datetime.fromisoformat(after[0]), int(after[1])
+        query = query.filter(or_(
+            NotificationHistory.sent_at < sent_at,
+            and_(NotificationHistory.sent_at == sent_at, NotificationHistory.id < history_id)
+        ))
+    
+    rows = (
+        query.order_by(NotificationHistory.sent_at.desc(), NotificationHistory.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.sent_at.isoformat(), last.id)
+    return rows[:limit], next_cursor
+
+# Refresh stored places for a (latitude, longitude, radius, category_id) prefetch job
+def refresh_tile(job):
+    latitude, longitude, radius, category_id = job
+    with app.app_context():
+        category = category_registry.get(category_id)
+        if category is None:
+            return
+        
+        places, from_upstream = fetch_nearby_places(latitude, longitude, radius, category)
+        if not from_upstream:
+            return
+        
+        rows = [result_to_row(place, category_id) for place in places]
+        place_db_ids = save_places(rows, {row['place_id'] for row in rows}, [job])
+        place_cache.put(
+            place_cache.key_for(latitude, longitude, radius, category.google_places_type),
+            [dict(row, id=place_db_ids.get(row['place_id'])) for row in rows]
+        )
+
+# Prefetch jobs for the most requested tiles in this worker not fetched from upstream within PREFETCH_STALE_AFTER
+def find_stale_hot_tiles():
+    with app.app_context():
+        jobs = hot_tiles.hottest(app.config["PREFETCH_HOT_TILES"])
+        fresh = find_covered_lookups(jobs, app.config["PREFETCH_STALE_AFTER"])
+        jobs = [job for job in jobs if job not in fresh]
+    hot_tiles.decay()
+    return jobs
+
+# Prefetch jobs for tiles with the most stale stored places; used when running without the web server
+def find_stale_stored_tiles():
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config["PREFETCH_STALE_AFTER"])
+    with app.app_context():
+        stale_places = (
+            db.session.query(Place.latitude, Place.longitude, Place.category_id)
+            .filter(Place.last_updated < cutoff, Place.category_id.isnot(None))
+            .order_by(Place.last_updated)
+            .limit(app.config["PREFETCH_HOT_TILES"] * 20)
+            .all()
+        )
+    
+    # Group by coarser tiles (about 1km) so one refresh covers neighbouring stale places
+    tracker = HotTileTracker(precision=6)
+    for latitude, longitude, category_id in stale_places:
+        tracker.record(latitude, longitude, app.config["PREFETCH_RADIUS"], category_id)
+    return tracker.hottest(app.config["PREFETCH_HOT_TILES"])
+
+# Build a prefetch worker that refreshes the tiles returned by find_stale
+def build_prefetch_worker(find_stale=find_stale_hot_tiles):
+    return PrefetchWorker(
+        refresh_tile,
+        find_stale,
+        interval=app.config["PREFETCH_INTERVAL"],
+        rate=app.config["PREFETCH_RATE"],
+        queue_size=app.config["PREFETCH_QUEUE_SIZE"],
+        min_interval=app.config["PREFETCH_STALE_AFTER"],
+    )
+
+prefetch_worker = build_prefetch_worker()
+if app.config["PREFETCH_ENABLED"]:
+    prefetch_worker.start()
+
+# Look up places of each category around each location, using one fan-out and one save for all of them.
+# Returns candidate place dicts per location, the names of categories that could not be loaded and
+# the names of categories served from stored places because the Places API was unavailable.
+def collect_nearby_candidates(locations, radius, categories):
+    categories_by_id = {category.id: category for category in categories}
+    
+    # Serve lookups from memory first; cached rows already carry their database ids
+    rows_by_lookup = {}
+    missed = {}
+    for location_index, (latitude, longitude) in enumerate(locations):
+        for category in categories:
+            hot_tiles.record(latitude, longitude, radius, category.id)
+            lookup = (location_index, category.id)
+            key = place_cache.key_for(latitude, longitude, radius, category.google_places_type)
+            rows = place_cache.get(key)
+            if rows is not None:
+                rows_by_lookup[lookup] = rows
+            else:
+                missed[lookup] = key
+    
+    # Then from stored places where the area was fetched from the Places API recently
+    covered = find_covered_lookups(
+        [(*locations[location_index], radius, category_id) for location_index, category_id in missed],
+        app.config["PLACES_DB_MAX_AGE"]
+    )
+    upstream_calls = {}
+    for lookup, key in missed.items():
+        latitude, longitude = locations[lookup[0]]
+        category = categories_by_id[lookup[1]]
+        fetched_at = covered.get((latitude, longitude, radius, category.id))
+        if fetched_at is None:
+            upstream_calls[lookup] = partial(fetch_nearby_places, latitude, longitude, radius, category)
+            continue
+        rows = find_fresh_places(category.id, latitude, longitude, radius, app.config["PLACES_DB_MAX_AGE"], fetched_at)
+        place_cache.record_db_hit()
+        place_cache.put(key, rows)
+        rows_by_lookup[lookup] = rows
+    
+    # Fetch the remaining lookups from Google Places API in parallel
+    incomplete_categories = set()
+    degraded_categories = set()
+    fetched = {}
+    refreshed_lookups = set()
+    if upstream_calls:
+        with phase("upstream"):
+            results, errors, timed_out = places_fanout.run(upstream_calls, app.config["NEARBY_DEADLINE"])
+        
+        for lookup, (places, from_upstream) in results.items():
+            fetched[lookup] = places
+            if from_upstream:
+                refreshed_lookups.add(lookup)
+            else:
+                degraded_categories.add(categories_by_id[lookup[1]].name)
+        
+        for (_, category_id), error in errors.items():
+            category = categories_by_id[category_id]
+            logger.error(f"Error fetching nearby places for category {category.name}: {error}")
+            incomplete_categories.add(category.name)
+        for _, category_id in timed_out:
+            category = categories_by_id[category_id]
+            logger.warning(f"Timed out fetching nearby places for category {category.name}")
+            incomplete_categories.add(category.name)
+    
+    # Collect fetched places so they can be saved in one upsert
+    place_rows = {}
+    for lookup, places in fetched.items():
+        try:
+            place_rows[lookup] = [result_to_row(place, lookup[1]) for place in places]
+        except (KeyError, TypeError) as e:
+            category = categories_by_id[lookup[1]]
+            logger.error(f"Error processing nearby places for category {category.name}: {e}")
+            incomplete_categories.add(category.name)
+            refreshed_lookups.discard(lookup)
+    
+    if place_rows:
+        # Places fetched from upstream in this request get their last_updated refreshed
+        refreshed = set()
+        for lookup in refreshed_lookups:
+            refreshed.update(row['place_id'] for row in place_rows[lookup])
+        
+        try:
+            place_db_ids = save_places(
+                [row for rows in place_rows.values() for row in rows],
+                refreshed,
+                [(*locations[location_index], radius, category_id) for location_index, category_id in refreshed_lookups]
+            )
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(f"Error saving nearby places: {e}")
+            place_db_ids = None
+        
+        for lookup, rows in place_rows.items():
+            rows = [dict(row, id=(place_db_ids or {}).get(row['place_id'])) for row in rows]
+            rows_by_lookup[lookup] = rows
+            # Only saved upstream answers are cached, so repeated pings need no database round-trips
+            if lookup in refreshed_lookups and place_db_ids is not None:
+                place_cache.put(missed[lookup], rows)
+    
+    candidates = [[] for _ in locations]
+    for (location_index, category_id), rows in rows_by_lookup.items():
+        category = categories_by_id[category_id]
+        for row in rows:
+            candidates[location_index].append({
+                "id": row['id'],
+                "place_id": row['place_id'],
+                "name": row['name'],
+                "category_id": category.id,
+                "category_name": category.name,
+                "latitude": row['latitude'],
+                "longitude": row['longitude'],
+                "address": row['address']
+            })
+    
+    return candidates, sorted(incomplete_categories), sorted(degraded_categories)
+
+# Positive number from a request body, or default when missing; raises ValueError on anything else
+def parse_positive_number(data, name, default, convert=float):
+    value = data.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid value for {name}: {value}")
+    try:
+        value = convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for {name}: {value}")
+    if not value > 0:
+        raise ValueError(f"{name} must be positive")
+    return value
+
+# Latitude and longitude of a position as finite floats within range; raises ValueError on anything else
+def parse_position(position):
+    coordinates = []
+    for name, bound in (('latitude', 90), ('longitude', 180)):
+        value = position.get(name)
+        if value is None or isinstance(value, bool):
+            raise ValueError(f"Invalid value for {name}: {value}")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {name}: {value}")
+        if not math.isfinite(value) or abs(value) > bound:
+            raise ValueError(f"{name} out of range: {value}")
+        coordinates.append(value)
+    return tuple(coordinates)
+
+# Validated max_distance and limit of a nearby request; max_distance is kept within the search radius
+# places were fetched for. Raises ValueError on bad input.
+def parse_match_args(data, user):
+    max_distance = parse_positive_number(data, 'max_distance', user.search_radius)
+    max_distance = min(max_distance, user.search_radius)
+    limit = parse_positive_number(data, 'limit', None, convert=int)
+    return max_distance, limit
+
+# Keep the nearest candidate places around a position and match the user's reminders to them
+def evaluate_position(user, geofence, latitude, longitude, candidates, max_distance, limit):
+    nearby, matches = geofence.evaluate(latitude, longitude, candidates, max_distance, limit)
+    
+    # Drop reminder/place pairs the user was already notified about within the cooldown
+    matches = [
+        (reminder, place, distance)
+        for reminder, place, distance in matches
+        if not notification_dedup.is_suppressed(user.id, reminder.id, place["id"])
+    ]
+    
+    return {
+        "places": [dict(place, distance=distance) for place, distance in nearby],
+        "reminders": [serialize_reminder(reminder) for reminder, _, _ in matches],
+        "matches": [
+            {"reminder_id": reminder.id, "place_id": place["id"], "distance": distance}
+            for reminder, place, distance in matches
+        ]
+    }
+
 # Home page
 @app.route('/')
 def index():
-    # For simplicity, use the test user
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return render_template('index.html', error="User not found")
     
-    reminders = db.session.query(Reminder).filter_by(user_id=user.id, completed=False).all()
-    categories = db.session.query(Category).all()
+    reminders = reminders_query().filter_by(user_id=user.id, completed=False).all()
+    categories = category_registry.all()
     
     return render_template('index.html', 
                            user=user,
@@ -89,19 +581,24 @@ def index():
 # Reminders page
 @app.route('/reminders')
 def reminder_list():
-    user = db.session.query(User).filter_by(username="testuser").first()
-    reminders = db.session.query(Reminder).filter_by(user_id=user.id).all()
-    categories = db.session.query(Category).all()
+    user = current_user()
+    try:
+        limit, after, _ = parse_page_args(REMINDER_FIELDS, 1)
+        reminders, next_cursor = reminders_page(user.id, limit, after)
+    except (ValueError, TypeError):
+        return redirect(url_for('reminder_list'))
+    categories = category_registry.all()
     
     return render_template('reminders.html',
                            user=user,
                            reminders=reminders,
+                           next_cursor=next_cursor,
                            categories=categories)
 
 # Settings page
 @app.route('/settings')
 def settings():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return render_template('settings.html', error="User not found")
     return render_template('settings.html', user=user)
@@ -109,29 +606,93 @@ def settings():
 # API Routes
 @app.route('/api/reminders', methods=['GET'])
 def get_reminders():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
-    reminders = db.session.query(Reminder).filter_by(user_id=user.id).all()
-    reminder_list = []
-    
-    for reminder in reminders:
-        reminder_list.append({
-            "id": reminder.id,
-            "title": reminder.title,
-            "description": reminder.description,
-            "category_id": reminder.category_id,
-            "category_name": reminder.category.name,
-            "completed": reminder.completed,
-            "created_at": reminder.created_at.isoformat()
-        })
+    try:
+        limit, after, fields = parse_page_args(REMINDER_FIELDS, 1)
+        reminders, next_cursor = reminders_page(
+            user.id,
+            limit,
+            after,
+            completed=parse_bool_arg('completed'),
+            category_id=request.args.get('category_id', type=int),
+            with_category=fields is None or "category_name" in fields
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "reminders": [serialize_reminder(reminder, fields) for reminder in reminders],
+        "next_cursor": next_cursor
+    })
+
+@app.route('/api/reminders/sync', methods=['GET'])
+def sync_reminders():
+    user = current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    
+    now = datetime.utcnow()
+    try:
+        token = request.args.get('since')
+        since = datetime.fromisoformat(decode_cursor(token, 1)[0]) if token else None
+        fields = parse_fields(request.args.get('fields'), REMINDER_FIELDS)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Without a token, or one older than the kept tombstones, the client has to replace its whole list
+    reset = since is None or since < now - timedelta(seconds=app.config["SYNC_TOMBSTONE_RETENTION"])
+    
+    query = reminders_query().filter(Reminder.user_id == user.id)
+    deleted = []
+    if not reset:
+        # Look back a little so changes committed while the previous sync ran are not missed
+        since -= timedelta(seconds=app.config["SYNC_OVERLAP"])
+        query = query.filter(Reminder.updated_at > since)
+        deleted = [
+            reminder_id for (reminder_id,) in db.session.query(ReminderTombstone.reminder_id)
+            .filter(ReminderTombstone.user_id == user.id, ReminderTombstone.deleted_at > since)
+        ]
+    
+    reminders = query.order_by(Reminder.updated_at, Reminder.id).all()
+    
+    return jsonify({
+        "reminders": [serialize_reminder(reminder, fields) for reminder in reminders],
+        "deleted": deleted,
+        "reset": reset,
+        "since": encode_cursor(now.isoformat())
+    })
+
+@app.route('/api/notification_history', methods=['GET'])
+def get_notification_history():
+    user = current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
     
-    return jsonify({"reminders": reminder_list})
+    try:
+        limit, after, fields = parse_page_args(HISTORY_FIELDS, 2)
+        rows, next_cursor = history_page(
+            user.id,
+            limit,
+            after,
+            reminder_id=request.args.get('reminder_id', type=int),
+            category_id=request.args.get('category_id', type=int)
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "notifications": [
+            {field: HISTORY_FIELDS[field](row) for field in fields or HISTORY_FIELDS} for row in rows
+        ],
+        "next_cursor": next_cursor
+    })
 
 @app.route('/api/reminders', methods=['POST'])
 def create_reminder():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -150,18 +711,11 @@ def create_reminder():
         
         db.session.add(new_reminder)
         db.session.commit()
+        movement_throttle.forget(user.id)
         
         return jsonify({
             "message": "Reminder created successfully",
-            "reminder": {
-                "id": new_reminder.id,
-                "title": new_reminder.title,
-                "description": new_reminder.description,
-                "category_id": new_reminder.category_id,
-                "category_name": new_reminder.category.name,
-                "completed": new_reminder.completed,
-                "created_at": new_reminder.created_at.isoformat()
-            }
+            "reminder": serialize_reminder(new_reminder)
         }), 201
     
     except SQLAlchemyError as e:
@@ -171,11 +725,11 @@ def create_reminder():
 
 @app.route('/api/reminders/<int:reminder_id>', methods=['PUT'])
 def update_reminder(reminder_id):
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
-    reminder = db.session.query(Reminder).filter_by(id=reminder_id, user_id=user.id).first()
+    reminder = reminders_query().filter_by(id=reminder_id, user_id=user.id).first()
     if not reminder:
         return jsonify({"error": "Reminder not found"}), 404
     
@@ -192,18 +746,11 @@ def update_reminder(reminder_id):
             reminder.completed = data['completed']
         
         db.session.commit()
+        movement_throttle.forget(user.id)
         
         return jsonify({
             "message": "Reminder updated successfully",
-            "reminder": {
-                "id": reminder.id,
-                "title": reminder.title,
-                "description": reminder.description,
-                "category_id": reminder.category_id,
-                "category_name": reminder.category.name,
-                "completed": reminder.completed,
-                "created_at": reminder.created_at.isoformat()
-            }
+            "reminder": serialize_reminder(reminder)
         })
     
     except SQLAlchemyError as e:
@@ -213,7 +760,7 @@ def update_reminder(reminder_id):
 
 @app.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
 def delete_reminder(reminder_id):
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -221,15 +768,24 @@ def delete_reminder(reminder_id):
     if not reminder:
         return jsonify({"error": "Reminder not found"}), 404
     
+    # Write out buffered notifications first so none of them refer to the deleted reminder
+    notification_buffer.flush_pending()
+    
     try:
         # First delete any notification history associated with this reminder
         notifications = db.session.query(NotificationHistory).filter_by(reminder_id=reminder_id).all()
         for notification in notifications:
             db.session.delete(notification)
         
-        # Then delete the reminder
+        # Then delete the reminder, leaving a tombstone for delta sync and pruning expired ones
         db.session.delete(reminder)
+        db.session.add(ReminderTombstone(reminder_id=reminder.id, user_id=user.id))
+        db.session.query(ReminderTombstone).filter(
+            ReminderTombstone.user_id == user.id,
+            ReminderTombstone.deleted_at < datetime.utcnow() - timedelta(seconds=app.config["SYNC_TOMBSTONE_RETENTION"])
+        ).delete(synchronize_session=False)
         db.session.commit()
+        movement_throttle.forget(user.id)
         
         return jsonify({"message": "Reminder deleted successfully"})
     
@@ -240,22 +796,19 @@ def delete_reminder(reminder_id):
 
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
-    categories = db.session.query(Category).all()
-    category_list = []
-    
-    for category in categories:
-        category_list.append({
-            "id": category.id,
-            "name": category.name,
-            "google_places_type": category.google_places_type,
-            "icon": category.icon
-        })
+    etag = category_registry.etag
+    # Weak comparison, since compressed responses carry the ETag as a weak validator
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify({"categories": [category.to_dict() for category in category_registry.all()]})
     
-    return jsonify({"categories": category_list})
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/settings', methods=['GET'])
 def get_settings():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -267,19 +820,34 @@ def get_settings():
 
 @app.route('/api/settings', methods=['PUT'])
 def update_settings():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
     data = request.json
+    if not isinstance(data, dict):
+        return jsonify({"error": "Missing settings"}), 400
     
+    # Values are checked and coerced before they are stored and cached
+    settings = {}
     try:
         if 'search_radius' in data:
-            user.search_radius = data['search_radius']
-        if 'notification_enabled' in data:
-            user.notification_enabled = data['notification_enabled']
-        
-        db.session.commit()
+            search_radius = parse_positive_number(data, 'search_radius', None, convert=int)
+            if search_radius is not None:
+                settings['search_radius'] = min(search_radius, app.config["MAX_SEARCH_RADIUS"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if 'notification_enabled' in data:
+        if not isinstance(data['notification_enabled'], bool):
+            return jsonify({"error": f"Invalid value for notification_enabled: {data['notification_enabled']}"}), 400
+        settings['notification_enabled'] = data['notification_enabled']
+    
+    try:
+        if settings:
+            db.session.query(User).filter_by(id=user.id).update(settings)
+            db.session.commit()
+            user = replace(user, **settings)
+            user_cache.put(user)
         
         return jsonify({
             "message": "Settings updated successfully",
@@ -292,12 +860,13 @@ def update_settings():
     
     except SQLAlchemyError as e:
         db.session.rollback()
+        user_cache.invalidate(user.username)
         logger.error(f"Error updating settings: {e}")
         return jsonify({"error": "Failed to update settings"}), 500
 
 @app.route('/api/nearby_places', methods=['POST'])
 def find_nearby_places():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -306,100 +875,125 @@ def find_nearby_places():
     if not data or 'latitude' not in data or 'longitude' not in data:
         return jsonify({"error": "Missing location data"}), 400
     
-    latitude = data['latitude']
-    longitude = data['longitude']
+    try:
+        latitude, longitude = parse_position(data)
+        max_distance, limit = parse_match_args(data, user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Reuse the last result while the user has barely moved, unless the client forces a refresh
+    signature = (user.search_radius, max_distance, limit)
+    if not data.get('force'):
+        previous = movement_throttle.check(user.id, latitude, longitude, user.search_radius, signature)
+        if previous is not None:
+            if data.get('accept_unchanged'):
+                return jsonify({"unchanged": True})
+            return negotiated_response(previous)
     
     # Get active reminders for the user
-    reminders = db.session.query(Reminder).filter_by(user_id=user.id, completed=False).all()
+    reminders = reminders_query().filter_by(user_id=user.id, completed=False).all()
     
     if not reminders:
         return jsonify({"places": [], "reminders": []})
     
-    # Get unique categories from active reminders
-    category_ids = set(reminder.category_id for reminder in reminders)
-    categories = db.session.query(Category).filter(Category.id.in_(category_ids)).all()
+    # Index reminders by category and get the categories they need
+    geofence = GeofenceEngine(reminders)
+    categories = [
+        category for category in category_registry.all() if category.id in geofence.category_ids
+    ]
     
-    # Get nearby places from Google Places API
-    nearby_places = []
-    relevant_reminders = []
+    candidates, incomplete_categories, degraded_categories = collect_nearby_candidates(
+        [(latitude, longitude)], user.search_radius, categories
+    )
     
-    for category in categories:
-        try:
-            places = get_nearby_places(
-                latitude, 
-                longitude, 
-                user.search_radius, 
-                category.google_places_type
-            )
-            
-            for place in places:
-                # Save the place to our database if not already exists
-                existing_place = db.session.query(Place).filter_by(place_id=place['place_id']).first()
-                
-                if not existing_place:
-                    new_place = Place(
-                        place_id=place['place_id'],
-                        name=place['name'],
-                        category_id=category.id,
-                        latitude=place['geometry']['location']['lat'],
-                        longitude=place['geometry']['location']['lng'],
-                        address=place.get('vicinity', '')
-                    )
-                    db.session.add(new_place)
-                    db.session.commit()
-                    place_db_id = new_place.id
-                else:
-                    place_db_id = existing_place.id
-                
-                # Find relevant reminders
-                category_reminders = [r for r in reminders if r.category_id == category.id]
-                
-                for reminder in category_reminders:
-                    if reminder not in relevant_reminders:
-                        relevant_reminders.append(reminder)
-                
-                nearby_places.append({
-                    "id": place_db_id,
-                    "place_id": place['place_id'],
-                    "name": place['name'],
-                    "category_id": category.id,
-                    "category_name": category.name,
-                    "latitude": place['geometry']['location']['lat'],
-                    "longitude": place['geometry']['location']['lng'],
-                    "address": place.get('vicinity', ''),
-                    "distance": calculate_distance(
-                        latitude, 
-                        longitude, 
-                        place['geometry']['location']['lat'], 
-                        place['geometry']['location']['lng']
-                    )
-                })
-        
-        except Exception as e:
-            logger.error(f"Error fetching nearby places for category {category.name}: {e}")
-    
-    # Format reminders for response
-    reminder_list = []
-    for reminder in relevant_reminders:
-        reminder_list.append({
-            "id": reminder.id,
-            "title": reminder.title,
-            "description": reminder.description,
-            "category_id": reminder.category_id,
-            "category_name": reminder.category.name
+    result = evaluate_position(user, geofence, latitude, longitude, candidates[0], max_distance, limit)
+    result["incomplete_categories"] = incomplete_categories
+    result["degraded_categories"] = degraded_categories
+    
+    # Partial or degraded results are not reused so the next ping retries the Places API
+    if not incomplete_categories and not degraded_categories:
+        movement_throttle.remember(user.id, latitude, longitude, result, signature)
+    
+    return negotiated_response(result)
+
+@app.route('/api/nearby_places/batch', methods=['POST'])
+def find_nearby_places_batch():
+    user = current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    
+    data = request.json
+    positions = data.get('positions') if data else None
+    
+    if not isinstance(positions, list) or not positions:
+        return jsonify({"error": "Missing positions"}), 400
+    if len(positions) > app.config["NEARBY_BATCH_MAX_POSITIONS"]:
+        return jsonify({"error": "Too many positions"}), 400
+    if any(not isinstance(position, dict) or 'latitude' not in position or 'longitude' not in position
+           for position in positions):
+        return jsonify({"error": "Missing location data"}), 400
+    
+    try:
+        coordinates = [parse_position(position) for position in positions]
+        max_distance, limit = parse_match_args(data, user)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    reminders = reminders_query().filter_by(user_id=user.id, completed=False).all()
+    
+    if not reminders:
+        return jsonify({
+            "results": [
+                {"timestamp": position.get('timestamp'), "places": [], "reminders": [], "matches": []}
+                for position in positions
+            ],
+            "incomplete_categories": [],
+            "degraded_categories": []
         })
     
-    # Sort places by distance
-    nearby_places.sort(key=lambda x: x['distance'])
+    geofence = GeofenceEngine(reminders)
+    categories = [
+        category for category in category_registry.all() if category.id in geofence.category_ids
+    ]
     
-    return jsonify({
-        "places": nearby_places,
-        "reminders": reminder_list
+    # Positions in the same tile share one set of place lookups
+    tile_indexes = {}
+    tile_locations = []
+    position_tiles = []
+    for latitude, longitude in coordinates:
+        tile = geohash_encode(latitude, longitude, place_cache.precision)
+        if tile not in tile_indexes:
+            tile_indexes[tile] = len(tile_locations)
+            tile_locations.append((latitude, longitude))
+        position_tiles.append(tile_indexes[tile])
+    
+    candidates, incomplete_categories, degraded_categories = collect_nearby_candidates(
+        tile_locations, user.search_radius, categories
+    )
+    
+    results = []
+    for position, (latitude, longitude), tile_index in zip(positions, coordinates, position_tiles):
+        result = evaluate_position(
+            user,
+            geofence,
+            latitude,
+            longitude,
+            candidates[tile_index],
+            max_distance,
+            limit
+        )
+        result["timestamp"] = position.get('timestamp')
+        results.append(result)
+    
+    return negotiated_response({
+        "results": results,
+        "incomplete_categories": incomplete_categories,
+        "degraded_categories": degraded_categories
     })
 
 @app.route('/api/record_notification', methods=['POST'])
 def record_notification():
-    user = db.session.query(User).filter_by(username="testuser").first()
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -408,6 +1002,27 @@ def record_notification():
     if not data or 'reminder_id' not in data or 'place_id' not in data:
         return jsonify({"error": "Missing required fields"}), 400
     
+    # Repeats within the cooldown are acknowledged without another history row
+    if notification_dedup.is_suppressed(user.id, data['reminder_id'], data['place_id']):
+        return jsonify({"message": "Notification already recorded", "suppressed": True})
+    
+    if app.config["NOTIFICATION_BUFFER_ENABLED"]:
+        queued = notification_buffer.add(
+            {
+                "user_id": user.id,
+                "reminder_id": data['reminder_id'],
+                "place_id": data['place_id'],
+                "sent_at": datetime.utcnow()
+            },
+            timeout=app.config["NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT"]
+        )
+        if not queued:
+            return jsonify({"error": "Too many notifications, try again later"}), 503, {"Retry-After": "1"}
+        
+        notification_dedup.record(user.id, data['reminder_id'], data['place_id'])
+        movement_throttle.forget(user.id)
+        return jsonify({"message": "Notification queued", "queued": True}), 202
+    
     try:
         notification = NotificationHistory(
             user_id=user.id,
@@ -417,6 +1032,8 @@ def record_notification():
         
         db.session.add(notification)
         db.session.commit()
+        notification_dedup.record(user.id, data['reminder_id'], data['place_id'])
+        movement_throttle.forget(user.id)
         
         return jsonify({"message": "Notification recorded successfully"}), 201
     
@@ -424,3 +1041,39 @@ def record_notification():
         db.session.rollback()
         logger.error(f"Error recording notification: {e}")
         return jsonify({"error": "Failed to record notification"}), 500
+
+@app.route('/api/places_cache/stats', methods=['GET'])
+def places_cache_stats():
+    stats = place_cache.stats()
+    stats["prefetch"] = prefetch_worker.stats()
+    stats["upstream"] = upstream_guard.stats()
+    stats["notification_buffer"] = notification_buffer.stats()
+    return jsonify(stats)
+
+@app.route('/api/known_places', methods=['GET'])
+def known_places():
+    latitude = request.args.get('latitude', type=float)
+    longitude = request.args.get('longitude', type=float)
+    if latitude is None or longitude is None:
+        return jsonify({"error": "Missing location data"}), 400
+    
+    radius = request.args.get('radius', default=1000, type=int)
+    if radius is None or radius <= 0:
+        return jsonify({"error": "radius must be a positive number of meters"}), 400
+    radius = min(radius, app.config["MAX_SEARCH_RADIUS"])
+    category_id = request.args.get('category_id', type=int)
+    
+    places = []
+    for distance, place in find_places_within(latitude, longitude, radius, category_id):
+        places.append({
+            "id": place["id"],
+            "place_id": place["place_id"],
+            "name": place["name"],
+            "category_id": place["category_id"],
+            "latitude": place["latitude"],
+            "longitude": place["longitude"],
+            "address": place["address"],
+            "distance": distance
+        })
+    
+    return negotiated_response({"places": places})
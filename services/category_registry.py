@@ -0,0 +1,71 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True)
+class CategoryInfo:
+    """Immutable snapshot of a category row"""
+
+    id: int
+    name: str
+    google_places_type: str
+    icon: str = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class CategoryRegistry:
+    """In-memory copy of the categories table, loaded once per process
+
+    loader() returns an iterable of CategoryInfo. The snapshot is reloaded on the
+    next access after invalidate(), or after ttl seconds when ttl is set, which
+    bounds staleness when another process changes categories.
+    """
+
+    def __init__(self, loader, ttl=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.version = 0
+        self._categories = None
+        self._by_id = {}
+        self._etag = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _snapshot(self):
+        with self._lock:
+            expired = self.ttl and time.monotonic() - self._loaded_at > self.ttl
+            if self._categories is None or expired:
+                categories = sorted(self.loader(), key=lambda category: category.id)
+                payload = json.dumps([category.to_dict() for category in categories], sort_keys=True)
+
+                self._categories = categories
+                self._by_id = {category.id: category for category in categories}
+                self._etag = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+                self._loaded_at = time.monotonic()
+                self.version += 1
+            return self._categories, self._by_id, self._etag
+
+    def all(self):
+        """Return all categories ordered by id"""
+        return list(self._snapshot()[0])
+
+    def get(self, category_id):
+        """Return the category with the given id, or None"""
+        return self._snapshot()[1].get(category_id)
+
+    @property
+    def etag(self):
+        """Content hash of the current snapshot, stable across processes"""
+        return self._snapshot()[2]
+
+    def invalidate(self):
+        """Drop the snapshot so the next access reloads it"""
+        with self._lock:
+            self._categories = None
+            self._by_id = {}
+            self._etag = None
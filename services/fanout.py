@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class FanOut:
+    """Bounded thread pool that runs independent calls under a shared deadline"""
+
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+
+    def run(self, calls, timeout):
+        """Run a dict of key -> callable and return (results, errors, timed_out)
+
+        Calls still running at the deadline are left to finish in the background
+        and reported in timed_out; their results are discarded.
+        """
+        futures = {self._executor.submit(fn): key for key, fn in calls.items()}
+        done, not_done = wait(futures, timeout=timeout)
+
+        results = {}
+        errors = {}
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = e
+
+        timed_out = []
+        for future in not_done:
+            future.cancel()
+            timed_out.append(futures[future])
+
+        return results, errors, timed_out
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
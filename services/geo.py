@@ -0,0 +1,125 @@
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_METERS = 6371000
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision=7):
+    """Encode a coordinate as a geohash string of the given precision"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def haversine_distance(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates in meters"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius):
+    """Return (min_lat, min_lng, max_lat, max_lng) enclosing a circle of radius meters"""
+    d_lat = math.degrees(radius / EARTH_RADIUS_METERS)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    d_lng = math.degrees(radius / (EARTH_RADIUS_METERS * cos_lat))
+
+    return (
+        max(latitude - d_lat, -90.0),
+        max(longitude - d_lng, -180.0),
+        min(latitude + d_lat, 90.0),
+        min(longitude + d_lng, 180.0),
+    )
+
+
+def haversine_distances(latitude, longitude, latitudes, longitudes):
+    """Distances in meters from one coordinate to each of many, computed in one batch
+
+    Uses NumPy when it is installed and falls back to a Python loop otherwise.
+    """
+    if np is None:
+        return [
+            haversine_distance(latitude, longitude, lat, lng)
+            for lat, lng in zip(latitudes, longitudes)
+        ]
+
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(np.asarray(latitudes, dtype=float))
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(longitudes, dtype=float) - longitude)
+
+    a = np.sin(d_phi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest(latitude, longitude, latitudes, longitudes, max_distance=None, limit=None):
+    """Return (index, distance) pairs for the nearest points, nearest first
+
+    Points farther than max_distance meters are dropped and at most limit pairs are
+    returned; only the surviving points are sorted.
+    """
+    if len(latitudes) == 0:
+        return []
+
+    distances = haversine_distances(latitude, longitude, latitudes, longitudes)
+
+    if np is None:
+        candidates = [
+            (distance, index) for index, distance in enumerate(distances)
+            if max_distance is None or distance <= max_distance
+        ]
+        if limit is not None:
+            candidates = heapq.nsmallest(limit, candidates)
+        else:
+            candidates.sort()
+        return [(index, distance) for distance, index in candidates]
+
+    indexes = np.arange(len(distances))
+    if max_distance is not None:
+        indexes = indexes[distances <= max_distance]
+    if limit is not None and len(indexes) > limit:
+        indexes = indexes[np.argpartition(distances[indexes], limit - 1)[:limit]]
+
+    indexes = indexes[np.argsort(distances[indexes], kind="stable")]
+    return [(int(index), float(distances[index])) for index in indexes]
@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from services.geo import nearest
+
+
+class GeofenceEngine:
+    """A user's active reminders indexed by category for matching against places"""
+
+    def __init__(self, reminders):
+        self._by_category = defaultdict(list)
+        for reminder in reminders:
+            self._by_category[reminder.category_id].append(reminder)
+
+    @property
+    def category_ids(self):
+        return set(self._by_category)
+
+    def evaluate(self, latitude, longitude, places, max_distance=None, limit=None):
+        """Match reminders against places around a position in one pass
+
+        places are dicts with latitude, longitude and category_id. Returns
+        (nearby, matches): nearby is a list of (place, distance) nearest first, limited
+        by max_distance and limit, and matches is a list of (reminder, place, distance)
+        pairing every reminder with the nearest place of its category within
+        max_distance, nearest first. limit only applies to nearby.
+        """
+        places = [place for place in places if place["category_id"] in self._by_category]
+        found = nearest(
+            latitude,
+            longitude,
+            [place["latitude"] for place in places],
+            [place["longitude"] for place in places],
+            max_distance=max_distance,
+        )
+        within = [(places[index], distance) for index, distance in found]
+
+        matches = []
+        matched_categories = set()
+        for place, distance in within:
+            category_id = place["category_id"]
+            if category_id in matched_categories:
+                continue
+            matched_categories.add(category_id)
+            for reminder in self._by_category[category_id]:
+                matches.append((reminder, place, distance))
+
+        nearby = within if limit is None else within[:limit]
+        return nearby, matches
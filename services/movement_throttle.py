@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.geo import haversine_distance
+
+
+class MovementThrottle:
+    """Per-user memory of the last evaluated position and its result
+
+    A new position is considered unchanged when it is within fraction * radius meters
+    of the remembered one, the result is younger than max_age seconds and the
+    request signature (settings and options that shape the result) is the same.
+    """
+
+    def __init__(self, fraction=0.1, max_age=120, max_entries=10000):
+        self.fraction = fraction
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, user_id, latitude, longitude, radius, signature=None):
+        """Return the remembered result if the user has not moved enough, else None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        evaluated_at, last_latitude, last_longitude, last_signature, result = entry
+        if time.monotonic() - evaluated_at > self.max_age or last_signature != signature:
+            return None
+
+        displacement = haversine_distance(last_latitude, last_longitude, latitude, longitude)
+        if displacement >= self.fraction * radius:
+            return None
+
+        return result
+
+    def remember(self, user_id, latitude, longitude, result, signature=None):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), latitude, longitude, signature, result)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id=None):
+        """Drop the remembered result for a user, or for everyone when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+
+class NotificationDedup:
+    """Recent (user, reminder, place) notifications kept in memory to enforce a cooldown
+
+    The first check for a user loads their history from the last cooldown seconds via
+    loader(user_id, since), where since is a naive UTC datetime and rows are
+    (reminder_id, place_id, sent_at). History is reloaded after refresh seconds so
+    sends recorded by other processes are picked up. At most max_entries sends are
+    kept; evicting one makes its user reload on the next check.
+    """
+
+    def __init__(self, loader, cooldown=3600, refresh=300, max_entries=100000):
+        self.loader = loader
+        self.cooldown = cooldown
+        self.refresh = refresh
+        self.max_entries = max_entries
+        self._sent = OrderedDict()
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _load_user(self, user_id):
+        with self._lock:
+            loaded_at = self._loaded.get(user_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.refresh:
+            return
+
+        rows = self.loader(user_id, datetime.utcnow() - timedelta(seconds=self.cooldown))
+
+        with self._lock:
+            self._loaded[user_id] = time.monotonic()
+            for reminder_id, place_id, sent_at in rows:
+                self._store((user_id, reminder_id, place_id), _timestamp(sent_at))
+
+    def _store(self, key, sent_at):
+        if sent_at <= self._sent.get(key, 0):
+            return
+        self._sent[key] = sent_at
+        self._sent.move_to_end(key)
+
+        while len(self._sent) > self.max_entries:
+            (user_id, _, _), _ = self._sent.popitem(last=False)
+            self._loaded.pop(user_id, None)
+
+    def is_suppressed(self, user_id, reminder_id, place_id):
+        """True if this reminder/place pair was sent to the user within the cooldown"""
+        self._load_user(user_id)
+        with self._lock:
+            sent_at = self._sent.get((user_id, reminder_id, place_id))
+        return sent_at is not None and time.time() - sent_at < self.cooldown
+
+    def record(self, user_id, reminder_id, place_id, sent_at=None):
+        """Remember a send; sent_at is a naive UTC datetime and defaults to now"""
+        timestamp = _timestamp(sent_at) if sent_at is not None else time.time()
+        with self._lock:
+            self._store((user_id, reminder_id, place_id), timestamp)
+
+
+def _timestamp(sent_at):
+    return sent_at.replace(tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(*values):
+    """Opaque cursor holding the sort key of the last row on a page"""
+    payload = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Sort key values of a cursor; raises ValueError when it was not made by encode_cursor"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_fields(value, allowed):
+    """Requested field names from a comma separated list, or None for all fields"""
+    if not value:
+        return None
+
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
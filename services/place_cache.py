@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.geo import geohash_encode
+
+
+class PlaceCache:
+    """LRU cache of nearby-place lookups keyed by geohash tile, radius and place type"""
+
+    def __init__(self, max_entries=1024, ttl=300, precision=7):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, latitude, longitude, radius, places_type):
+        """Build the cache key for a lookup"""
+        return (geohash_encode(latitude, longitude, self.precision), int(radius), places_type)
+
+    def get(self, key):
+        """Return cached places for key, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, places = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return places
+
+    def put(self, key, places):
+        """Store places for key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, places)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_db_hit(self):
+        """Count a miss that was served from the places table instead of upstream"""
+        with self._lock:
+            self.db_hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "precision": self.precision,
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
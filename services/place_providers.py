@@ -0,0 +1,103 @@
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from services.geo import bounding_box, haversine_distance
+
+
+class PlaceProvider(ABC):
+    """Source of nearby places, returned in the Google Places API result shape"""
+
+    @abstractmethod
+    def get_nearby_places(self, latitude, longitude, radius, places_type):
+        """List of place results within radius meters of a position for a Places API type"""
+
+
+class GooglePlacesProvider(PlaceProvider):
+    """Looks places up with the Google Places API"""
+
+    def get_nearby_places(self, latitude, longitude, radius, places_type):
+        # Imported lazily so other providers work without the Google client
+        from services.google_places import get_nearby_places
+        return get_nearby_places(latitude, longitude, radius, places_type)
+
+
+class SyntheticPlaceError(Exception):
+    """Injected failure from SyntheticPlacesProvider"""
+
+
+class SyntheticPlacesProvider(PlaceProvider):
+    """Deterministic generated places for load testing without the real API
+
+    The world is split into cells of cell_size degrees and each cell holds
+    places_per_cell places per type, generated from seed, so the same query always
+    returns the same places. Each call sleeps latency seconds plus up to jitter
+    seconds and fails with probability error_rate. At most max_results places are
+    returned, like the Places API.
+    """
+
+    def __init__(self, seed=0, places_per_cell=2, cell_size=0.005, latency=0.0, jitter=0.0,
+                 error_rate=0.0, max_results=20):
+        self.seed = seed
+        self.places_per_cell = places_per_cell
+        self.cell_size = cell_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_results = max_results
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _cell_places(self, row, col, places_type):
+        rng = random.Random(f"{self.seed}:{places_type}:{row}:{col}")
+        places = []
+        for index in range(self.places_per_cell):
+            lat = (row + rng.random()) * self.cell_size
+            lng = (col + rng.random()) * self.cell_size
+            places.append({
+                "place_id": f"synthetic-{places_type}-{row}-{col}-{index}",
+                "name": f"{places_type.replace('_', ' ').title()} {row}/{col}/{index}",
+                "geometry": {"location": {"lat": lat, "lng": lng}},
+                "vicinity": f"{abs(row) % 1000} Synthetic Street",
+            })
+        return places
+
+    def get_nearby_places(self, latitude, longitude, radius, places_type):
+        with self._lock:
+            delay = self.latency + self._random.random() * self.jitter
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise SyntheticPlaceError(f"Injected failure for {places_type}")
+
+        min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius)
+        places = []
+        for row in range(math.floor(min_lat / self.cell_size), math.floor(max_lat / self.cell_size) + 1):
+            for col in range(math.floor(min_lng / self.cell_size), math.floor(max_lng / self.cell_size) + 1):
+                for place in self._cell_places(row, col, places_type):
+                    location = place["geometry"]["location"]
+                    if haversine_distance(latitude, longitude, location["lat"], location["lng"]) <= radius:
+                        places.append(place)
+
+        return places[:self.max_results]
+
+
+def create_place_provider(config):
+    """Build the provider named by config["PLACES_PROVIDER"]"""
+    name = config.get("PLACES_PROVIDER", "google")
+
+    if name == "google":
+        return GooglePlacesProvider()
+    if name == "synthetic":
+        return SyntheticPlacesProvider(
+            seed=config.get("SYNTHETIC_PLACES_SEED", 0),
+            places_per_cell=config.get("SYNTHETIC_PLACES_PER_CELL", 2),
+            latency=config.get("SYNTHETIC_PLACES_LATENCY", 0.0),
+            jitter=config.get("SYNTHETIC_PLACES_JITTER", 0.0),
+            error_rate=config.get("SYNTHETIC_PLACES_ERROR_RATE", 0.0),
+        )
+
+    raise ValueError(f"Unknown places provider: {name}")
@@ -0,0 +1,295 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import app, db
+from models import Place, PlaceLookup
+from services.geo import geohash_encode
+from services.spatial_index import GridIndex
+
+logger = logging.getLogger(__name__)
+
+# Columns refreshed when an existing place is seen again; category_id keeps its first value
+_UPSERT_COLUMNS = ("name", "latitude", "longitude", "address", "last_updated")
+
+# Seconds between a lookup's fetched_at and the commit of its places; index cells loaded in
+# that window may not include them
+_COMMIT_MARGIN = 5
+
+
+def place_to_dict(place):
+    """Snapshot the columns of a Place that the index serves"""
+    return {
+        "id": place.id,
+        "place_id": place.place_id,
+        "name": place.name,
+        "category_id": place.category_id,
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "address": place.address,
+        "last_updated": place.last_updated,
+    }
+
+
+def place_to_result(place):
+    """Convert an indexed place into the shape returned by the Places API"""
+    return {
+        "place_id": place["place_id"],
+        "name": place["name"],
+        "geometry": {"location": {"lat": place["latitude"], "lng": place["longitude"]}},
+        "vicinity": place["address"] or "",
+    }
+
+
+def place_to_row(place):
+    """Convert an indexed place into the row shape of result_to_row, with its id"""
+    return {
+        "id": place["id"],
+        "place_id": place["place_id"],
+        "name": place["name"],
+        "category_id": place["category_id"],
+        "latitude": place["latitude"],
+        "longitude": place["longitude"],
+        "address": place["address"] or "",
+    }
+
+
+def _load_places_in_box(min_lat, min_lng, max_lat, max_lng):
+    places = (
+        db.session.query(Place)
+        .filter(
+            Place.latitude.between(min_lat, max_lat),
+            Place.longitude.between(min_lng, max_lng),
+        )
+        .all()
+    )
+    return [
+        (place.place_id, place.latitude, place.longitude, place.category_id, place_to_dict(place))
+        for place in places
+    ]
+
+
+# In-process spatial index over the places table, filled per grid cell on demand
+place_index = GridIndex(
+    loader=_load_places_in_box,
+    cell_size=app.config["PLACES_INDEX_CELL_SIZE"],
+    cell_ttl=app.config["PLACES_INDEX_CELL_TTL"],
+    max_cells=app.config["PLACES_INDEX_MAX_CELLS"],
+)
+
+
+def find_places_within(latitude, longitude, radius, category_id=None, max_age=None, loaded_after=None):
+    """Get stored places within radius meters as (distance, place) pairs, nearest first
+
+    Places can be restricted to a category and to those updated in the last max_age seconds.
+    Index cells loaded before loaded_after (a time.time() timestamp) are read again from
+    the database.
+    """
+    try:
+        matches = place_index.query(latitude, longitude, radius, category_id, loaded_after)
+    except SQLAlchemyError as e:
+        logger.error(f"Error loading stored places: {e}")
+        db.session.rollback()
+        return []
+
+    if max_age is not None:
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+        matches = [
+            (distance, place) for distance, place in matches
+            if place["last_updated"] and place["last_updated"] >= cutoff
+        ]
+
+    return matches
+
+
+def lookup_tile(latitude, longitude):
+    """Geohash tile a lookup position falls in, at the precision of the nearby cache"""
+    return geohash_encode(latitude, longitude, app.config["PLACES_CACHE_PRECISION"])
+
+
+def find_covered_lookups(lookups, max_age):
+    """Map (latitude, longitude, radius, category_id) lookups whose tile was fetched upstream to when
+
+    A lookup is covered when the Places API was asked for the same tile and category,
+    with at least the same radius, within the last max_age seconds. Lookups that are
+    not covered are left out.
+    """
+    lookups = list(lookups)
+    if not lookups:
+        return {}
+
+    tiles = {lookup_tile(latitude, longitude) for latitude, longitude, _, _ in lookups}
+    category_ids = {category_id for _, _, _, category_id in lookups}
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    try:
+        rows = (
+            db.session.query(PlaceLookup.tile, PlaceLookup.category_id, PlaceLookup.radius, PlaceLookup.fetched_at)
+            .filter(
+                PlaceLookup.tile.in_(tiles),
+                PlaceLookup.category_id.in_(category_ids),
+                PlaceLookup.fetched_at >= cutoff,
+            )
+            .all()
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Error loading place lookups: {e}")
+        db.session.rollback()
+        return {}
+
+    covered = {}
+    for lookup in lookups:
+        tile = lookup_tile(lookup[0], lookup[1])
+        fetched = [
+            fetched_at for row_tile, category_id, radius, fetched_at in rows
+            if row_tile == tile and category_id == lookup[3] and radius >= lookup[2]
+        ]
+        if fetched:
+            covered[lookup] = max(fetched)
+    return covered
+
+
+def find_fresh_places(category_id, latitude, longitude, radius, max_age, fetched_at=None):
+    """Get stored places of a category within radius meters that were updated in the last max_age seconds
+
+    Places are returned as rows with their id, like save_places leaves them. fetched_at is when the area was last fetched upstream, possibly by another process;
+    index cells loaded before then are reloaded.
+    """
+    loaded_after = None
+    if fetched_at is not None:
+        loaded_after = fetched_at.replace(tzinfo=timezone.utc).timestamp() + _COMMIT_MARGIN
+    return [
+        place_to_row(place)
+        for _, place in find_places_within(latitude, longitude, radius, category_id, max_age, loaded_after)
+    ]
+
+
+def result_to_row(place, category_id):
+    """Convert a Places API result into column values for the places table"""
+    return {
+        "place_id": place["place_id"],
+        "name": place["name"],
+        "category_id": category_id,
+        "latitude": place["geometry"]["location"]["lat"],
+        "longitude": place["geometry"]["location"]["lng"],
+        "address": place.get("vicinity", ""),
+    }
+
+
+def save_places(rows, refreshed=(), lookups=()):
+    """Store places and return a map of place_id to Place.id
+
+    Rows whose place_id is not stored yet are inserted, rows whose place_id is in
+    refreshed are updated and have last_updated bumped; everything is done with one
+    lookup, one upsert statement and one commit. The (latitude, longitude, radius,
+    category_id) lookups that were just answered by the Places API are recorded in
+    the same transaction so find_covered_lookups serves their area locally. The write uses its own connection
+    so objects loaded in the request session are not expired. Raises SQLAlchemyError
+    on failure.
+    """
+    if not rows and not lookups:
+        return {}
+
+    places = Place.__table__
+    place_ids = {row["place_id"] for row in rows}
+
+    with db.engine.begin() as connection:
+        known = {
+            place_id: (id, category_id)
+            for place_id, id, category_id in connection.execute(
+                select(places.c.place_id, places.c.id, places.c.category_id)
+                .where(places.c.place_id.in_(place_ids))
+            )
+        }
+        ids = {place_id: id for place_id, (id, _) in known.items()}
+
+        now = datetime.utcnow()
+        pending = {}
+        for row in rows:
+            if row["place_id"] not in ids or row["place_id"] in refreshed:
+                pending[row["place_id"]] = dict(row, last_updated=now)
+
+        if pending:
+            ids.update(_upsert_places(connection, list(pending.values()), ids))
+        if lookups:
+            _record_lookups(connection, lookups, now)
+
+    for place_id, row in pending.items():
+        # The upsert keeps the category_id of places that were already stored
+        category_id = known[place_id][1] if place_id in known else row["category_id"]
+        place = dict(row, id=ids.get(place_id), category_id=category_id)
+        place_index.add(place_id, row["latitude"], row["longitude"], category_id, place)
+
+    return ids
+
+
+def _upsert_places(connection, rows, existing_ids):
+    places = Place.__table__
+
+    if connection.dialect.name in ("postgresql", "sqlite"):
+        dialect_insert = postgresql_insert if connection.dialect.name == "postgresql" else sqlite_insert
+        stmt = dialect_insert(places).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[places.c.place_id],
+            set_={column: stmt.excluded[column] for column in _UPSERT_COLUMNS},
+        ).returning(places.c.place_id, places.c.id)
+        return dict(connection.execute(stmt).all())
+
+    # Other databases: bulk update known rows, bulk insert new ones, then look up the new ids
+    updates = [
+        dict({f"new_{column}": row[column] for column in _UPSERT_COLUMNS}, existing_id=existing_ids[row["place_id"]])
+        for row in rows
+        if row["place_id"] in existing_ids
+    ]
+    inserts = [row for row in rows if row["place_id"] not in existing_ids]
+
+    if updates:
+        connection.execute(
+            update(places)
+            .where(places.c.id == bindparam("existing_id"))
+            .values({column: bindparam(f"new_{column}") for column in _UPSERT_COLUMNS}),
+            updates,
+        )
+    if inserts:
+        connection.execute(insert(places), inserts)
+        return dict(
+            connection.execute(
+                select(places.c.place_id, places.c.id)
+                .where(places.c.place_id.in_([row["place_id"] for row in inserts]))
+            ).all()
+        )
+    return {}
+
+
+def _record_lookups(connection, lookups, fetched_at):
+    lookups_table = PlaceLookup.__table__
+    rows = {}
+    for latitude, longitude, radius, category_id in lookups:
+        tile = lookup_tile(latitude, longitude)
+        rows[(tile, int(radius), category_id)] = {
+            "tile": tile, "radius": int(radius), "category_id": category_id, "fetched_at": fetched_at
+        }
+    rows = list(rows.values())
+
+    if connection.dialect.name in ("postgresql", "sqlite"):
+        dialect_insert = postgresql_insert if connection.dialect.name == "postgresql" else sqlite_insert
+        stmt = dialect_insert(lookups_table).values(rows)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[lookups_table.c.tile, lookups_table.c.radius, lookups_table.c.category_id],
+            set_={"fetched_at": stmt.excluded.fetched_at},
+        ))
+        return
+
+    # Other databases: replace the rows
+    for row in rows:
+        connection.execute(
+            lookups_table.delete().where(
+                lookups_table.c.tile == row["tile"],
+                lookups_table.c.radius == row["radius"],
+                lookups_table.c.category_id == row["category_id"],
+            )
+        )
+    connection.execute(insert(lookups_table), rows)
@@ -0,0 +1,170 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from services.geo import geohash_encode
+from services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class HotTileTracker:
+    """Counts nearby lookups per (tile, radius, category) to find the most requested areas"""
+
+    def __init__(self, precision=7, max_entries=10000):
+        self.precision = precision
+        self.max_entries = max_entries
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, latitude, longitude, radius, category_id):
+        key = (geohash_encode(latitude, longitude, self.precision), int(radius), category_id)
+        with self._lock:
+            entry = self._tiles.get(key)
+            if entry is None:
+                # Keep the first position seen as the tile's representative location
+                self._tiles[key] = [1.0, latitude, longitude]
+            else:
+                entry[0] += 1
+            self._tiles.move_to_end(key)
+
+            while len(self._tiles) > self.max_entries:
+                self._tiles.popitem(last=False)
+
+    def hottest(self, limit):
+        """Return up to limit (latitude, longitude, radius, category_id) jobs, most requested first"""
+        with self._lock:
+            entries = sorted(self._tiles.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            (latitude, longitude, radius, category_id)
+            for (_, radius, category_id), (_, latitude, longitude) in entries[:limit]
+        ]
+
+    def decay(self, factor=0.5, threshold=0.1):
+        """Scale all counts down so hotness follows recent demand, dropping cold tiles"""
+        with self._lock:
+            for key in list(self._tiles):
+                self._tiles[key][0] *= factor
+                if self._tiles[key][0] < threshold:
+                    del self._tiles[key]
+
+
+class PrefetchWorker:
+    """Background refresher for stale places in frequently requested tiles
+
+    Every interval seconds find_stale() is asked for jobs, which are queued (at most
+    queue_size; extra jobs are dropped) and passed to refresh(job) at no more than
+    rate jobs per second. A job is not refreshed again within min_interval seconds.
+    Both callables must set up any application context they need.
+    """
+
+    def __init__(self, refresh, find_stale, interval=60, rate=1.0, queue_size=256, min_interval=3600):
+        self.refresh = refresh
+        self.find_stale = find_stale
+        self.interval = interval
+        self.min_interval = min_interval
+        self._bucket = TokenBucket(rate)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = set()
+        self._refreshed_at = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.refreshed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, job):
+        """Queue a job unless it is already queued, recently refreshed or the queue is full"""
+        with self._lock:
+            if job in self._pending:
+                return False
+            refreshed_at = self._refreshed_at.get(job)
+            if refreshed_at is not None and time.monotonic() - refreshed_at < self.min_interval:
+                return False
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._pending.add(job)
+            return True
+
+    def scan(self):
+        """Queue the jobs reported by find_stale"""
+        with self._lock:
+            cutoff = time.monotonic() - self.min_interval
+            self._refreshed_at = {
+                job: refreshed_at for job, refreshed_at in self._refreshed_at.items() if refreshed_at > cutoff
+            }
+
+        try:
+            jobs = self.find_stale()
+        except Exception as e:
+            logger.error(f"Error finding stale tiles to prefetch: {e}")
+            return
+
+        for job in jobs:
+            self.submit(job)
+
+    def _process(self, job):
+        self._bucket.acquire()
+        try:
+            self.refresh(job)
+            self.refreshed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error prefetching places for {job}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(job)
+                self._refreshed_at[job] = time.monotonic()
+
+    def run_once(self):
+        """Scan once and refresh everything queued, in the calling thread"""
+        self.scan()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(job)
+
+    def run_forever(self):
+        """Scan and refresh in the calling thread until stop() is called"""
+        next_scan = 0.0
+        while not self._stopped.is_set():
+            if time.monotonic() >= next_scan:
+                self.scan()
+                next_scan = time.monotonic() + self.interval
+
+            try:
+                job = self._queue.get(timeout=max(0.0, min(next_scan - time.monotonic(), 1.0)))
+            except queue.Empty:
+                continue
+            self._process(job)
+
+    def start(self):
+        """Run the worker on a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="place-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
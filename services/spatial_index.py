@@ -0,0 +1,138 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from services.geo import bounding_box, nearest
+
+
+class GridIndex:
+    """Spatial index that buckets points into fixed-size lat/lng grid cells
+
+    Cells are filled on demand by loader(min_lat, min_lng, max_lat, max_lng), which
+    returns (key, latitude, longitude, category_id, payload) tuples, and are reloaded
+    once they are older than cell_ttl seconds or were loaded before the loaded_after
+    time passed to query(). At most max_cells cells are kept; a
+    query covering more cells than that bypasses the grid and calls loader once for
+    its bounding box.
+    """
+
+    def __init__(self, loader=None, cell_size=0.01, cell_ttl=600, max_cells=10000):
+        self.loader = loader
+        self.cell_size = cell_size
+        self.cell_ttl = cell_ttl
+        self.max_cells = max_cells
+        self._cells = OrderedDict()
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+
+    def _cell_for(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def _count_cells(self, min_lat, min_lng, max_lat, max_lng):
+        low_row, low_col = self._cell_for(min_lat, min_lng)
+        high_row, high_col = self._cell_for(max_lat, max_lng)
+        return (high_row - low_row + 1) * (high_col - low_col + 1)
+
+    def _cells_covering(self, min_lat, min_lng, max_lat, max_lng):
+        low_row, low_col = self._cell_for(min_lat, min_lng)
+        high_row, high_col = self._cell_for(max_lat, max_lng)
+        return [
+            (row, col)
+            for row in range(low_row, high_row + 1)
+            for col in range(low_col, high_col + 1)
+        ]
+
+    def _bucket(self, cell):
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            bucket = self._cells[cell] = {}
+        self._cells.move_to_end(cell)
+
+        while len(self._cells) > self.max_cells:
+            evicted, _ = self._cells.popitem(last=False)
+            self._loaded_at.pop(evicted, None)
+
+        return bucket
+
+    def add(self, key, latitude, longitude, category_id, payload):
+        """Insert or replace a point"""
+        with self._lock:
+            self._bucket(self._cell_for(latitude, longitude))[key] = (
+                latitude, longitude, category_id, payload
+            )
+
+    def _load_missing(self, cells, loaded_after=None):
+        # Wall-clock load times, so they compare with timestamps written by other processes
+        now = time.time()
+        with self._lock:
+            missing = [
+                cell for cell in cells
+                if now - self._loaded_at.get(cell, -math.inf) > self.cell_ttl
+                or (loaded_after is not None and self._loaded_at[cell] < loaded_after)
+            ]
+        if not missing or self.loader is None:
+            return
+
+        # Load the box spanning all missing cells in one call
+        min_row = min(row for row, _ in missing)
+        max_row = max(row for row, _ in missing)
+        min_col = min(col for _, col in missing)
+        max_col = max(col for _, col in missing)
+        rows = self.loader(
+            min_row * self.cell_size,
+            min_col * self.cell_size,
+            (max_row + 1) * self.cell_size,
+            (max_col + 1) * self.cell_size,
+        )
+
+        with self._lock:
+            for cell in missing:
+                self._bucket(cell).clear()
+                self._loaded_at[cell] = now
+            for key, latitude, longitude, category_id, payload in rows:
+                cell = self._cell_for(latitude, longitude)
+                if cell in self._loaded_at:
+                    self._bucket(cell)[key] = (latitude, longitude, category_id, payload)
+
+    def query(self, latitude, longitude, radius, category_id=None, loaded_after=None):
+        """Return (distance, payload) pairs within radius meters, nearest first
+
+        Cells loaded before loaded_after, a time.time() timestamp, are reloaded first,
+        for data another process is known to have written since.
+        """
+        box = bounding_box(latitude, longitude, radius)
+        if self.loader is not None and self._count_cells(*box) > self.max_cells:
+            # Too large to cache cell by cell (wide radius or near a pole): load the box directly
+            points = [
+                (point_lat, point_lng, point_category_id, payload)
+                for _, point_lat, point_lng, point_category_id, payload in self.loader(*box)
+                if category_id is None or point_category_id == category_id
+            ]
+        else:
+            cells = self._cells_covering(*box)
+            self._load_missing(cells, loaded_after)
+
+            points = []
+            with self._lock:
+                for cell in cells:
+                    bucket = self._cells.get(cell)
+                    if not bucket:
+                        continue
+                    for point in bucket.values():
+                        if category_id is None or point[2] == category_id:
+                            points.append(point)
+
+        found = nearest(
+            latitude,
+            longitude,
+            [point[0] for point in points],
+            [point[1] for point in points],
+            max_distance=radius,
+        )
+        return [(distance, points[index][3]) for index, distance in found]
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._loaded_at.clear()
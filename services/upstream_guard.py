@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.rate_limit import TokenBucket
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling upstream when the circuit is open or the quota is spent"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn, or wait for and share the result of an identical call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class QuotaBudget:
+    """Token bucket per key, so no single key can use up the upstream quota"""
+
+    def __init__(self, rate, burst=None, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return bucket.try_acquire()
+
+
+class CircuitBreaker:
+    """Stops calling upstream after repeated failures or slow calls
+
+    After failure_threshold consecutive failures (calls slower than slow_call seconds
+    count as failures) the circuit opens for reset_timeout seconds, then lets a single
+    trial call through; its outcome closes or reopens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, slow_call=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a permission from allow() for a call that was never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, latency):
+        """Record a completed call and its latency in seconds"""
+        if self.slow_call is not None and latency > self.slow_call:
+            self.record_failure()
+            return
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """Single-flight coalescing, per-key quota and a circuit breaker around upstream calls"""
+
+    def __init__(self, breaker, quota=None):
+        self.breaker = breaker
+        self.quota = quota
+        self.single_flight = SingleFlight()
+        self.rejected = 0
+
+    def call(self, flight_key, quota_key, fn):
+        """Run fn for flight_key, sharing the result with identical concurrent calls
+
+        Raises UpstreamUnavailable when the circuit is open or quota_key has no budget
+        left; errors raised by fn are passed through.
+        """
+        return self.single_flight.do(flight_key, lambda: self._guarded(quota_key, fn))
+
+    def _guarded(self, quota_key, fn):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise UpstreamUnavailable("circuit open")
+        if self.quota is not None and not self.quota.try_acquire(quota_key):
+            # Free the half-open trial slot, or the circuit would never be tried again
+            self.breaker.release()
+            self.rejected += 1
+            raise UpstreamUnavailable(f"quota exhausted for {quota_key}")
+
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record(time.monotonic() - started)
+        return result
+
+    def stats(self):
+        return {
+            "circuit": self.breaker.state,
+            "coalesced": self.single_flight.coalesced,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class UserInfo:
+    """Immutable snapshot of a user row and its settings"""
+
+    id: int
+    username: str
+    email: str
+    search_radius: int
+    notification_enabled: bool
+
+
+class UserCache:
+    """Short-lived LRU cache of UserInfo snapshots keyed by username
+
+    loader(username) returns a UserInfo or None; unknown users are not cached.
+    """
+
+    def __init__(self, loader, ttl=30, max_entries=10000):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        """Return the user for username, loading it on a miss or after the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(username)
+                return entry[1]
+
+        user = self.loader(username)
+        if user is not None:
+            self.put(user)
+        return user
+
+    def put(self, user):
+        """Store a fresh snapshot, e.g. right after the user was updated"""
+        with self._lock:
+            self._entries[user.username] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username=None):
+        """Forget one user, or everyone when username is None"""
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
@@ -0,0 +1,151 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Bounded queue of records written in batches by a background thread
+
+    Records passed to add() are handed to flush(records) in batches of up to
+    max_batch, as soon as a full batch is waiting or at most interval seconds after
+    the oldest one was added. At most max_pending records are held: add() then waits
+    up to its timeout for room and gives up, so callers can push back. A batch whose
+    flush raises is put back and retried on the next cycle unless that would exceed
+    max_pending, in which case it is dropped. flush must set up any application
+    context it needs. Whatever is pending is flushed by stop(), which also runs at
+    interpreter exit once the buffer is started.
+    """
+
+    def __init__(self, flush, max_batch=500, interval=1.0, max_pending=10000):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._oldest_at = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def add(self, record, timeout=0.0):
+        """Queue a record, waiting up to timeout seconds for room; False if it was not queued"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while len(self._pending) >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if self._stopped or remaining <= 0:
+                    self.rejected += 1
+                    return False
+                self._condition.wait(remaining)
+
+            # Wake the writer when the interval starts counting and when a batch is full
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+                self._condition.notify_all()
+            self._pending.append(record)
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify_all()
+            return True
+
+    def _take_batch(self):
+        batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+        self._oldest_at = time.monotonic() if self._pending else None
+        self._condition.notify_all()
+        return batch
+
+    def _write(self, batch):
+        try:
+            self.flush(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} buffered records: {e}")
+            with self._condition:
+                self.failed += 1
+                if len(self._pending) + len(batch) > self.max_pending:
+                    self.dropped += len(batch)
+                    logger.error(f"Dropped {len(batch)} buffered records")
+                    return False
+                self._pending.extendleft(reversed(batch))
+                self._oldest_at = time.monotonic()
+            return False
+
+        with self._condition:
+            self.written += len(batch)
+            self.batches += 1
+        return True
+
+    def flush_pending(self):
+        """Write everything queued so far in the calling thread"""
+        with self._flush_lock:
+            while True:
+                with self._condition:
+                    if not self._pending:
+                        return
+                    batch = self._take_batch()
+                if not self._write(batch):
+                    return
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if len(self._pending) >= self.max_batch:
+                        break
+                    if self._oldest_at is not None:
+                        remaining = self._oldest_at + self.interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                batch = self._take_batch()
+
+            with self._flush_lock:
+                written = self._write(batch)
+
+            # Back off before retrying so a failing database is not hammered
+            if not written:
+                retry_at = time.monotonic() + self.interval
+                with self._condition:
+                    while not self._stopped and time.monotonic() < retry_at:
+                        self._condition.wait(retry_at - time.monotonic())
+
+    def start(self):
+        """Write batches on a daemon thread and flush what is left at interpreter exit"""
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush_pending()
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
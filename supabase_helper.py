@@ -1,34 +1,26 @@
 import os
 import logging
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest.exceptions import APIError
+from database import get_supabase, run_concurrently
+from services.category_registry import CategoryInfo, CategoryRegistry
+from services.write_behind import WriteBehindBuffer
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-
-if not supabase_url or not supabase_key:
-    logger.error("Supabase URL or key not found in environment variables")
-    raise ValueError("Supabase URL or key not found in environment variables")
-
-try:
-    supabase: Client = create_client(supabase_url, supabase_key)
-    logger.info("Supabase client initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing Supabase client: {e}")
-    raise
+# Ids per request when fetching by id list, keeping the query string well under URL limits
+FETCH_CHUNK_SIZE = int(os.getenv("SUPABASE_FETCH_CHUNK_SIZE", 100))
 
 # Helper functions to work with Supabase
 
 def get_user_by_username(username):
     """Get a user by username"""
     try:
-        response = supabase.table("users").select("*").eq("username", username).execute()
+        response = get_supabase().table("users").select("*").eq("username", username).execute()
         data = response.data
         return data[0] if data else None
     except Exception as e:
@@ -38,7 +30,7 @@ def get_user_by_username(username):
 def get_reminders_by_user_id(user_id, completed=None):
     """Get reminders for a user"""
     try:
-        query = supabase.table("reminders").select("*").eq("user_id", user_id)
+        query = get_supabase().table("reminders").select("*").eq("user_id", user_id)
         
         if completed is not None:
             query = query.eq("completed", completed)
@@ -49,11 +41,55 @@ def get_reminders_by_user_id(user_id, completed=None):
         logger.error(f"Error getting reminders: {e}")
         return []
 
+def fetch_by_ids(table, ids, column="id"):
+    """Fetch the rows of a table whose column is in ids, with chunks requested concurrently"""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return []
+    
+    chunks = [ids[start:start + FETCH_CHUNK_SIZE] for start in range(0, len(ids), FETCH_CHUNK_SIZE)]
+    results = run_concurrently({
+        index: lambda chunk=chunk: get_supabase().table(table).select("*").in_(column, chunk).execute().data
+        for index, chunk in enumerate(chunks)
+    })
+    return [row for index in range(len(chunks)) for row in results[index]]
+
+def get_reminders_by_ids(reminder_ids):
+    """Get several reminders by ID"""
+    try:
+        return fetch_by_ids("reminders", reminder_ids)
+    except Exception as e:
+        logger.error(f"Error getting reminders: {e}")
+        return []
+
+def get_places_by_place_ids(place_ids):
+    """Get several places by their Google place_id"""
+    try:
+        return fetch_by_ids("places", place_ids, column="place_id")
+    except Exception as e:
+        logger.error(f"Error getting places: {e}")
+        return []
+
+def load_categories():
+    """Load all categories for the category registry"""
+    response = get_supabase().table("categories").select("*").execute()
+    return [
+        CategoryInfo(
+            id=row["id"],
+            name=row["name"],
+            google_places_type=row["google_places_type"],
+            icon=row.get("icon")
+        )
+        for row in response.data
+    ]
+
+# Categories are static after seeding; keep them in memory and reload periodically
+category_registry = CategoryRegistry(load_categories, ttl=int(os.getenv("CATEGORY_REGISTRY_TTL", 300)))
+
 def get_categories():
     """Get all categories"""
     try:
-        response = supabase.table("categories").select("*").execute()
-        return response.data
+        return [category.to_dict() for category in category_registry.all()]
     except Exception as e:
         logger.error(f"Error getting categories: {e}")
         return []
@@ -61,35 +97,39 @@ def get_categories():
 def get_category_by_id(category_id):
     """Get a category by ID"""
     try:
-        response = supabase.table("categories").select("*").eq("id", category_id).execute()
-        data = response.data
-        return data[0] if data else None
+        category = category_registry.get(category_id)
+        return category.to_dict() if category else None
     except Exception as e:
         logger.error(f"Error getting category: {e}")
         return None
 
 def create_reminder(user_id, title, category_id, description=""):
     """Create a new reminder"""
+    created = create_reminders([{
+        "user_id": user_id,
+        "title": title,
+        "description": description,
+        "category_id": category_id
+    }])
+    return created[0] if created else None
+
+def create_reminders(reminders):
+    """Create several reminders in a single request"""
+    if not reminders:
+        return []
+    
     try:
-        reminder_data = {
-            "user_id": user_id,
-            "title": title,
-            "description": description,
-            "category_id": category_id,
-            "completed": False,
-            "created_at": "now()"
-        }
-        
-        response = supabase.table("reminders").insert(reminder_data).execute()
-        return response.data[0] if response.data else None
+        rows = [dict(reminder, completed=reminder.get("completed", False), created_at="now()") for reminder in reminders]
+        response = get_supabase().table("reminders").insert(rows).execute()
+        return response.data or []
     except Exception as e:
-        logger.error(f"Error creating reminder: {e}")
-        return None
+        logger.error(f"Error creating reminders: {e}")
+        return []
 
 def update_reminder(reminder_id, data):
     """Update a reminder"""
     try:
-        response = supabase.table("reminders").update(data).eq("id", reminder_id).execute()
+        response = get_supabase().table("reminders").update(data).eq("id", reminder_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error updating reminder: {e}")
@@ -98,7 +138,7 @@ def update_reminder(reminder_id, data):
 def delete_reminder(reminder_id):
     """Delete a reminder"""
     try:
-        response = supabase.table("reminders").delete().eq("id", reminder_id).execute()
+        response = get_supabase().table("reminders").delete().eq("id", reminder_id).execute()
         return True
     except Exception as e:
         logger.error(f"Error deleting reminder: {e}")
@@ -107,43 +147,95 @@ def delete_reminder(reminder_id):
 def update_user_settings(user_id, settings):
     """Update user settings"""
     try:
-        response = supabase.table("users").update(settings).eq("id", user_id).execute()
+        response = get_supabase().table("users").update(settings).eq("id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error updating user settings: {e}")
         return None
 
 def save_place(place_data):
-    """Save a place to the database"""
+    """Save a place to the database, updating it if the place_id already exists"""
+    saved = save_places([place_data])
+    return saved[0] if saved else None
+
+def save_places(places):
+    """Upsert places by place_id in a single request and refresh last_updated"""
+    if not places:
+        return []
+    
     try:
-        # Check if place already exists
-        response = supabase.table("places").select("*").eq("place_id", place_data["place_id"]).execute()
-        
-        if response.data:
-            # Update existing place
-            place_id = response.data[0]["id"]
-            response = supabase.table("places").update(place_data).eq("id", place_id).execute()
-            return response.data[0] if response.data else None
-        else:
-            # Create new place
-            response = supabase.table("places").insert(place_data).execute()
-            return response.data[0] if response.data else None
+        rows = [dict(place, last_updated="now()") for place in places]
+        response = get_supabase().table("places").upsert(rows, on_conflict="place_id").execute()
+        return response.data or []
     except Exception as e:
-        logger.error(f"Error saving place: {e}")
-        return None
+        logger.error(f"Error saving places: {e}")
+        return []
+
+def insert_notifications(notifications):
+    """Insert buffered notifications in a single request, raising on failure so the buffer retries
+
+    A batch refused by a constraint (say a reminder was deleted meanwhile) is inserted
+    one row at a time so only the bad rows are dropped.
+    """
+    try:
+        get_supabase().table("notification_history").insert(notifications).execute()
+        return
+    except APIError as e:
+        # Class 23 is a Postgres integrity constraint violation; anything else is retried
+        if not str(e.code or "").startswith("23"):
+            raise
+        logger.warning(f"Batch of {len(notifications)} notifications rejected, inserting one at a time: {e}")
+    
+    for notification in notifications:
+        try:
+            get_supabase().table("notification_history").insert(notification).execute()
+        except APIError as e:
+            if not str(e.code or "").startswith("23"):
+                raise
+            logger.error(f"Dropped notification {notification}: {e}")
+
+# Optional write-behind buffer for notification history inserts, configured like the one in routes
+notification_buffer = WriteBehindBuffer(
+    insert_notifications,
+    max_batch=int(os.getenv("NOTIFICATION_BUFFER_MAX_BATCH", 500)),
+    interval=float(os.getenv("NOTIFICATION_BUFFER_INTERVAL", 1.0)),
+    max_pending=int(os.getenv("NOTIFICATION_BUFFER_MAX_PENDING", 10000)),
+)
+NOTIFICATION_BUFFER_ENABLED = os.getenv("NOTIFICATION_BUFFER_ENABLED", "false").lower() in ("1", "true", "yes")
+NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT = float(os.getenv("NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT", 0.5))
+if NOTIFICATION_BUFFER_ENABLED:
+    notification_buffer.start()
 
 def record_notification(user_id, reminder_id, place_id):
-    """Record a notification in history"""
+    """Record a notification in history
+
+    With NOTIFICATION_BUFFER_ENABLED the notification is queued and written in a batch
+    later: the queued row is returned without an id, or None if the buffer is full.
+    """
+    notification = {
+        "user_id": user_id,
+        "reminder_id": reminder_id,
+        "place_id": place_id
+    }
+    if NOTIFICATION_BUFFER_ENABLED:
+        notification["sent_at"] = datetime.now(timezone.utc).isoformat()
+        if not notification_buffer.add(notification, timeout=NOTIFICATION_BUFFER_ENQUEUE_TIMEOUT):
+            logger.error("Notification buffer is full, notification not recorded")
+            return None
+        return notification
+    
+    recorded = record_notifications([notification])
+    return recorded[0] if recorded else None
+
+def record_notifications(notifications):
+    """Record several notifications in a single request; sent_at defaults to now"""
+    if not notifications:
+        return []
+    
     try:
-        notification_data = {
-            "user_id": user_id,
-            "reminder_id": reminder_id,
-            "place_id": place_id,
-            "sent_at": "now()"
-        }
-        
-        response = supabase.table("notification_history").insert(notification_data).execute()
-        return response.data[0] if response.data else None
+        rows = [dict(notification, sent_at=notification.get("sent_at", "now()")) for notification in notifications]
+        response = get_supabase().table("notification_history").insert(rows).execute()
+        return response.data or []
     except Exception as e:
-        logger.error(f"Error recording notification: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Error recording notifications: {e}")
+        return []
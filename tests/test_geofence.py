@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from services.geofence import GeofenceEngine
+
+
+def place(name, category_id, latitude):
+    return {"name": name, "category_id": category_id, "latitude": latitude, "longitude": 0.0}
+
+
+def test_matches_are_not_cut_by_limit():
+    reminders = [SimpleNamespace(id=1, category_id=1), SimpleNamespace(id=2, category_id=2)]
+    places = [
+        place("cafe", 1, 0.001),
+        place("cafe 2", 1, 0.002),
+        place("pharmacy", 2, 0.003),
+    ]
+
+    nearby, matches = GeofenceEngine(reminders).evaluate(0.0, 0.0, places, max_distance=1000, limit=1)
+
+    assert [place["name"] for place, _ in nearby] == ["cafe"]
+    assert [(reminder.id, place["name"]) for reminder, place, _ in matches] == [(1, "cafe"), (2, "pharmacy")]
+
+
+def test_matches_respect_max_distance():
+    reminders = [SimpleNamespace(id=1, category_id=1)]
+    places = [place("far cafe", 1, 0.1)]
+
+    nearby, matches = GeofenceEngine(reminders).evaluate(0.0, 0.0, places, max_distance=1000)
+
+    assert nearby == []
+    assert matches == []
@@ -0,0 +1,63 @@
+import time
+
+from services.spatial_index import GridIndex
+
+
+class RecordingLoader:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.boxes = []
+
+    def __call__(self, min_lat, min_lng, max_lat, max_lng):
+        self.boxes.append((min_lat, min_lng, max_lat, max_lng))
+        return [
+            row for row in self.rows
+            if min_lat <= row[1] <= max_lat and min_lng <= row[2] <= max_lng
+        ]
+
+
+def test_small_query_is_served_from_cached_cells():
+    loader = RecordingLoader([("a", 40.0, -74.0, 1, "a")])
+    index = GridIndex(loader=loader, cell_size=0.01, max_cells=100)
+
+    assert [payload for _, payload in index.query(40.0, -74.0, 500)] == ["a"]
+    assert [payload for _, payload in index.query(40.0, -74.0, 500)] == ["a"]
+    assert len(loader.boxes) == 1
+
+
+def test_wide_query_loads_bounding_box_once_without_caching():
+    loader = RecordingLoader([("a", 40.0, -74.0, 1, "a"), ("b", 40.5, -74.0, 2, "b")])
+    index = GridIndex(loader=loader, cell_size=0.01, max_cells=100)
+
+    found = index.query(40.0, -74.0, 100000, category_id=2)
+    assert [payload for _, payload in found] == ["b"]
+    assert len(loader.boxes) == 1
+    assert index._cells == {}
+
+
+def test_query_near_pole_does_not_enumerate_cells():
+    loader = RecordingLoader([("a", 89.9999, 10.0, 1, "a")])
+    index = GridIndex(loader=loader, cell_size=0.01, max_cells=10000)
+
+    found = index.query(89.9999, 10.0, 1000)
+    assert [payload for _, payload in found] == ["a"]
+    assert len(loader.boxes) == 1
+
+
+def test_cells_loaded_before_another_index_wrote_are_reloaded():
+    stored = RecordingLoader()
+    worker_a = GridIndex(loader=stored, cell_size=0.01, max_cells=100)
+    worker_b = GridIndex(loader=stored, cell_size=0.01, max_cells=100)
+
+    # Worker A loads the area while it is still empty
+    assert worker_a.query(40.0, -74.0, 500) == []
+
+    # Worker B fetches the area upstream and stores its places
+    fetched_at = time.time()
+    stored.rows.append(("a", 40.0, -74.0, 1, "a"))
+    worker_b.add("a", 40.0, -74.0, 1, "a")
+
+    assert worker_a.query(40.0, -74.0, 500) == []
+    found = worker_a.query(40.0, -74.0, 500, loaded_after=fetched_at + 1)
+    assert [payload for _, payload in found] == ["a"]
+    assert [payload for _, payload in worker_b.query(40.0, -74.0, 500)] == ["a"]
@@ -0,0 +1,50 @@
+import pytest
+
+from services.upstream_guard import CircuitBreaker, QuotaBudget, UpstreamGuard, UpstreamUnavailable
+
+
+def open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_quota_rejected_trial_does_not_keep_circuit_open():
+    breaker = open_breaker()
+    guard = UpstreamGuard(breaker, QuotaBudget(rate=0.001, burst=1))
+    assert guard.call("warm", "spent", lambda: "ok") == "ok"
+    breaker.record_failure()
+
+    with pytest.raises(UpstreamUnavailable, match="quota"):
+        guard.call("a", "spent", lambda: "ok")
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # The trial slot is free again, so another key gets through and closes the circuit
+    assert guard.call("b", "other", lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_failure_reopens_circuit():
+    breaker = open_breaker()
+    guard = UpstreamGuard(breaker)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        guard.call("a", "key", fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_base_exception_counts_as_failure():
+    breaker = open_breaker()
+    guard = UpstreamGuard(breaker)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        guard.call("a", "key", interrupted)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert guard.call("b", "key", lambda: "ok") == "ok"
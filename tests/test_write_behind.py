@@ -0,0 +1,53 @@
+import threading
+import time
+
+from services.write_behind import WriteBehindBuffer
+
+
+def test_single_record_is_written_after_interval():
+    written = threading.Event()
+    batches = []
+
+    def flush(records):
+        batches.append(list(records))
+        written.set()
+
+    buffer = WriteBehindBuffer(flush, max_batch=500, interval=0.1)
+    buffer.start()
+    try:
+        assert buffer.add("first")
+        assert written.wait(1.0)
+        assert batches == [["first"]]
+        assert buffer.stats()["pending"] == 0
+    finally:
+        buffer.stop()
+
+
+def test_full_batch_is_written_before_interval():
+    written = threading.Event()
+    buffer = WriteBehindBuffer(lambda records: written.set(), max_batch=3, interval=60)
+    buffer.start()
+    try:
+        for record in range(3):
+            buffer.add(record)
+        assert written.wait(1.0)
+    finally:
+        buffer.stop()
+
+
+def test_stop_flushes_pending_records():
+    batches = []
+    buffer = WriteBehindBuffer(batches.append, max_batch=500, interval=60)
+    buffer.add("left over")
+    buffer.stop()
+    assert batches == [["left over"]]
+
+
+def test_add_rejects_when_full():
+    buffer = WriteBehindBuffer(lambda records: None, max_pending=2, interval=60)
+    assert buffer.add(1)
+    assert buffer.add(2)
+    started = time.monotonic()
+    assert not buffer.add(3, timeout=0.05)
+    assert time.monotonic() - started >= 0.05
+    assert buffer.stats()["rejected"] == 1